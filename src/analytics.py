@@ -1,8 +1,135 @@
 # -*- coding: utf-8 -*-
 
+import collections
+import math
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Inputs shorter than this are averaged in pure Python, numpy only pays off
+# once the conversion overhead is amortized
+NUMPY_MIN_LENGTH = 64
+# Below this window a C level sum of every slice beats a Python running sum
+RUNNING_MIN_DAYS = 64
+# Means closer than this (relative, in cents) to a rounding tie are
+# recomputed the way the original loop did, so the rounded output stays
+# identical even though the sums are accumulated in a different order
+ROUNDING_TOLERANCE = 1e-9
+
+
+def _near_tie(scaled):
+    """Whether rounding scaled / 100 to cents depends on the summation order"""
+    return abs(scaled) < 1 or (
+        abs(scaled - math.floor(scaled) - 0.5) < ROUNDING_TOLERANCE * abs(scaled)
+    )
+
+
+def _moving_average_exact(data, days):
+    result = []
+    data = data[:]
+    for _ in range(len(data) - days + 1):
+        result.append(round(sum(data[-days:]) / days, 2))
+        data.pop()
+    return result[::-1]
+
+
+def _moving_average_slices(data, days):
+    return [
+        round(sum(data[i : i + days]) / days, 2) for i in range(len(data) - days + 1)
+    ]
+
+
+def _moving_average_running(data, days):
+    """O(n) moving average, the window sum is resynced every days steps"""
+    result = []
+    append = result.append
+    total = 0
+    for i in range(len(data) - days + 1):
+        if i % days == 0 or not math.isfinite(total):
+            total = sum(data[i : i + days])
+        else:
+            total += data[i + days - 1] - data[i - 1]
+        scaled = total * 100 / days
+        if not math.isfinite(scaled):
+            append(round(total / days, 2))
+        elif _near_tie(scaled):
+            append(round(sum(data[i : i + days]) / days, 2))
+        else:
+            append(round(total / days, 2))
+    return result
+
+
+def _window_means(cumsum, days, error, exact):
+    """Round the window means of a cumulative sum array like the legacy loop
+
+    error bounds the absolute error of cumsum, exact(i) returns the legacy
+    mean of window i and is only called near a rounding tie.
+    """
+    scaled = (cumsum[days:] - cumsum[:-days]) / days * 100
+    tolerance = ROUNDING_TOLERANCE * numpy.abs(scaled) + error / days * 100
+    result = (numpy.rint(scaled) / 100).tolist()
+    ties = numpy.abs(scaled - numpy.floor(scaled) - 0.5) < tolerance
+    ties |= numpy.abs(scaled) < 1
+    for i in numpy.flatnonzero(ties).tolist():
+        result[i] = exact(i)
+    return result
+
+
+def _moving_average_numpy(data, days):
+    """Cumulative sum moving average, None when data is not all finite"""
+    try:
+        values = numpy.asarray(data, dtype=float)
+    except (TypeError, ValueError):
+        return None
+    if values.ndim != 1 or not numpy.isfinite(values).all():
+        return None
+    if len(values) < days:
+        return []
+    cumsum = numpy.concatenate(([0.0], numpy.cumsum(values)))
+    # Bound the cumulative sum error before deciding which means are ties
+    error = 4 * numpy.finfo(float).eps * len(values) * numpy.abs(cumsum).max()
+    return _window_means(
+        cumsum, days, error, lambda i: round(sum(data[i : i + days]) / days, 2)
+    )
+
+
+def _rolling_extreme(data, days, better):
+    """Return (values, indexes) of the first extreme of every days window
+
+    Monotonic deque: it holds the indexes of the values no later value has
+    beaten yet, oldest and best first, so each value is pushed and popped
+    once. better is operator.gt for maxima and operator.lt for minima.
+    """
+    values, indexes = [], []
+    window = collections.deque()
+    for i, value in enumerate(data):
+        while window and better(value, data[window[-1]]):
+            window.pop()
+        window.append(i)
+        if window[0] <= i - days:
+            window.popleft()
+        if i >= days - 1:
+            values.append(data[window[0]])
+            indexes.append(window[0])
+    return values, indexes
+
+
+def _memo(data, indicator, params, compute):
+    # Column views of a StockData memoize their indicators, see ColumnView
+    memo = getattr(data, "memo", None)
+    if memo is None:
+        return compute()
+    return memo(indicator, params, compute)
+
 
 class Analytics(object):
     def continuous(self, data):
+        return _memo(data, "continuous", (), lambda: self._continuous(data))
+
+    def _continuous(self, data):
         diff = [1 if data[-i] > data[-i - 1] else -1 for i in range(1, len(data))]
         cont = 0
         for v in diff:
@@ -13,17 +140,76 @@ class Analytics(object):
         return cont * diff[0]
 
     def moving_average(self, data, days):
-        result = []
-        data = data[:]
-        for _ in range(len(data) - days + 1):
-            result.append(round(sum(data[-days:]) / days, 2))
-            data.pop()
-        return result[::-1]
+        return _memo(
+            data, "moving_average", (days,), lambda: self._moving_average(data, days)
+        )
+
+    def _moving_average(self, data, days):
+        if days < 1:
+            return _moving_average_exact(data, days)
+        # Columns of a StockData with a prefix sum index, see PrefixSums
+        prefix_sums = getattr(data, "prefix_sums", None)
+        if prefix_sums is not None:
+            result = prefix_sums.moving_average(days)
+            if result is not None:
+                return result
+        if numpy is not None and len(data) >= NUMPY_MIN_LENGTH:
+            result = _moving_average_numpy(data, days)
+            if result is not None:
+                return result
+        if days >= RUNNING_MIN_DAYS:
+            return _moving_average_running(data, days)
+        return _moving_average_slices(data, days)
+
+    def rolling_max(self, data, days):
+        """Return the maximum of every days window, aligned like
+        moving_average"""
+        return _memo(
+            data,
+            "rolling_max",
+            (days,),
+            lambda: _rolling_extreme(data, days, operator.gt)[0],
+        )
+
+    def rolling_min(self, data, days):
+        """Return the minimum of every days window, aligned like
+        moving_average"""
+        return _memo(
+            data,
+            "rolling_min",
+            (days,),
+            lambda: _rolling_extreme(data, days, operator.lt)[0],
+        )
+
+    def channel_width(self, days):
+        """Return the days high minus the days low of every day"""
+        highs = self.rolling_max(self.high, days)
+        lows = self.rolling_min(self.low, days)
+        return [high - low for high, low in zip(highs, lows)]
+
+    def new_highs(self, data, days):
+        """Return whether each value beats the days values before it,
+        from data[days] on"""
+        return [v > high for v, high in zip(data[days:], self.rolling_max(data, days))]
+
+    def new_lows(self, data, days):
+        """Return whether each value is below the days values before it,
+        from data[days] on"""
+        return [v < low for v, low in zip(data[days:], self.rolling_min(data, days))]
 
     def ma_bias_ratio(self, day1, day2):
         """Calculate moving average bias ratio"""
-        data1 = self.moving_average(self.price, day1)
-        data2 = self.moving_average(self.price, day2)
+        price = self.price
+        return _memo(
+            price,
+            "ma_bias_ratio",
+            (day1, day2),
+            lambda: self._ma_bias_ratio(price, day1, day2),
+        )
+
+    def _ma_bias_ratio(self, price, day1, day2):
+        data1 = self.moving_average(price, day1)
+        data2 = self.moving_average(price, day2)
         result = [
             data1[-i] - data2[-i] for i in range(1, min(len(data1), len(data2)) + 1)
         ]
@@ -32,6 +218,14 @@ class Analytics(object):
 
     def ma_bias_ratio_pivot(self, data, sample_size=5, position=False):
         """Calculate pivot point"""
+        return _memo(
+            data,
+            "ma_bias_ratio_pivot",
+            (sample_size, position),
+            lambda: self._ma_bias_ratio_pivot(data, sample_size, position),
+        )
+
+    def _ma_bias_ratio_pivot(self, data, sample_size, position):
         sample = data[-sample_size:]
 
         if position is True:
@@ -56,12 +250,19 @@ class BestFourPoint(object):
     BEST_BUY_WHY = ["量大收紅", "量縮價不跌", "三日均價由下往上", "三日均價大於六日均價"]
     BEST_SELL_WHY = ["量大收黑", "量縮價跌", "三日均價由上往下", "三日均價小於六日均價"]
 
-    def __init__(self, stock):
+    def __init__(self, stock, short: int = 3, long: int = 6, sample_size: int = 5):
+        """short and long are the days of the two moving averages, and
+        sample_size the days the bias ratio pivot looks back"""
         self.stock = stock
+        self.short = short
+        self.long = long
+        self.sample_size = sample_size
 
     def bias_ratio(self, position=False):
         return self.stock.ma_bias_ratio_pivot(
-            self.stock.ma_bias_ratio(3, 6), position=position
+            self.stock.ma_bias_ratio(self.short, self.long),
+            self.sample_size,
+            position=position,
         )
 
     def plus_bias_ratio(self):
@@ -84,13 +285,16 @@ class BestFourPoint(object):
 
     def best_buy_3(self):
         return (
-            self.stock.continuous(self.stock.moving_average(self.stock.price, 3)) == 1
+            self.stock.continuous(
+                self.stock.moving_average(self.stock.price, self.short)
+            )
+            == 1
         )
 
     def best_buy_4(self):
         return (
-            self.stock.moving_average(self.stock.price, 3)[-1]
-            > self.stock.moving_average(self.stock.price, 6)[-1]
+            self.stock.moving_average(self.stock.price, self.short)[-1]
+            > self.stock.moving_average(self.stock.price, self.long)[-1]
         )
 
     def best_sell_1(self):
@@ -107,13 +311,16 @@ class BestFourPoint(object):
 
     def best_sell_3(self):
         return (
-            self.stock.continuous(self.stock.moving_average(self.stock.price, 3)) == -1
+            self.stock.continuous(
+                self.stock.moving_average(self.stock.price, self.short)
+            )
+            == -1
         )
 
     def best_sell_4(self):
         return (
-            self.stock.moving_average(self.stock.price, 3)[-1]
-            < self.stock.moving_average(self.stock.price, 6)[-1]
+            self.stock.moving_average(self.stock.price, self.short)[-1]
+            < self.stock.moving_average(self.stock.price, self.long)[-1]
         )
 
     def best_four_point_to_buy(self):
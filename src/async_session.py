@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+# Usage: Shared aiohttp session for the asyncio fetchers
+#
+# aiohttp is optional, it is only required once a coroutine fetcher is used.
+#
+
+import asyncio
+import urllib.parse
+from collections import namedtuple
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from proxy import get_proxies
+from session import decode_payload
+from throttle import get_rate_limiter
+
+DEFAULT_CONCURRENCY = 100
+DEFAULT_LIMIT_PER_HOST = 8
+DEFAULT_HEADERS = {"Accept-Encoding": "gzip, deflate"}
+
+Response = namedtuple("Response", ["status", "content_type", "body"])
+
+
+class AsyncSessionPool(object):
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+    ):
+        """concurrency bounds the requests in flight on the event loop,
+        limit_per_host the connections opened to a single host."""
+        self.concurrency = concurrency
+        self.limit_per_host = limit_per_host
+        self._loop = None
+        self._session = None
+        self._semaphore = None
+
+    async def _ensure_session(self):
+        # aiohttp sessions are bound to the loop they were created in
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            if aiohttp is None:
+                raise ImportError("aiohttp is required for asyncio fetchers")
+            previous = self._session, self._loop
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.concurrency, limit_per_host=self.limit_per_host
+                ),
+                headers=DEFAULT_HEADERS,
+            )
+            # Replaced after the swap, so no other coroutine sees it
+            await self._close_session(*previous)
+        return self._session
+
+    async def request(self, url, params=None, proxies=None):
+        """Return the Response of GET url, its body as bytes"""
+        session = await self._ensure_session()
+        proxy = (proxies or {}).get(urllib.parse.urlparse(url).scheme)
+        await get_rate_limiter().async_acquire(url)
+        async with self._semaphore:
+            async with session.get(url, params=params, proxy=proxy) as r:
+                return Response(
+                    r.status, r.headers.get("Content-Type", ""), await r.read()
+                )
+
+    async def get(self, url, params=None, proxies=None):
+        """Return the response body of GET url as text"""
+        response = await self.request(url, params, proxies)
+        return response.body.decode("utf_8", "replace")
+
+    @staticmethod
+    async def _close_session(session, loop):
+        if session is None or session.closed:
+            return
+        if loop is asyncio.get_running_loop() or not loop.is_running():
+            await session.close()
+        else:
+            # Still serving another thread's loop, closed over there
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+
+    async def close(self):
+        session, self._session = self._session, None
+        await self._close_session(session, self._loop)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+async def fetch_json(url, params=None, retry: int = 5):
+    """Coroutine version of session.fetch_json"""
+    for retry_i in range(retry):
+        response = await get_async_session_pool().request(
+            url, params=params, proxies=get_proxies()
+        )
+        data = decode_payload(url, *response)
+        if data is not None:
+            return data
+    return None
+
+
+_pool_instance = AsyncSessionPool()
+
+
+def reset_async_session_pool():
+    configure_async_session_pool(AsyncSessionPool())
+
+
+def configure_async_session_pool(pool_instance):
+    global _pool_instance
+    if not isinstance(pool_instance, AsyncSessionPool):
+        raise BaseException("async session pool should be an AsyncSessionPool object")
+    _pool_instance = pool_instance
+
+
+def get_async_session_pool():
+    return _pool_instance
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+#
+# Usage: Replay BestFourPoint over the whole history of many stocks
+#
+#   >>> result = Backtest(StockMatrix.from_stocks(stocks))
+#   >>> result.buy[result.matrix.index('2330')]       # signal of every day
+#   >>> result.summary(horizons=(1, 5, 20))
+#
+# Every rule only looks a few bars back, so the signal of every day is
+# computed for every stock with whole-matrix numpy operations instead of
+# evaluating BestFourPoint again on each prefix of the history.
+#
+
+from collections import namedtuple
+
+from matrix import StockMatrix, numpy
+
+Summary = namedtuple(
+    "Summary", ["signal", "horizon", "count", "mean_return", "win_rate"]
+)
+
+
+def _shift(values, fill=None):
+    """Return values moved one column to the right, the previous day"""
+    result = numpy.full_like(values, numpy.nan if fill is None else fill)
+    result[:, 1:] = values[:, :-1]
+    return result
+
+
+class Backtest(object):
+    def __init__(
+        self,
+        matrix,
+        short: int = 3,
+        long: int = 6,
+        sample_size: int = 5,
+        use_pivot: bool = False,
+    ):
+        """Evaluate BestFourPoint on every day of a StockMatrix
+
+        short, long and sample_size are those of BestFourPoint.
+        Like BestFourPoint, a day is only gated on having a bias ratio;
+        with use_pivot the bias ratio pivot has to hold as well. Rows
+        should be contiguous histories, e.g. a tail aligned matrix.
+        """
+        self.matrix = matrix
+        self.short = short
+        self.long = long
+        self.sample_size = sample_size
+        self.use_pivot = use_pivot
+
+        price, capacity, open = matrix.price, matrix.capacity, matrix.open
+        average_short = matrix.moving_average(price, short)
+        average_long = matrix.moving_average(price, long)
+        bias = average_short - average_long
+        self.ready = numpy.isfinite(bias)
+
+        # Analytics.continuous of the short average is +1 (-1) on the day
+        # its direction turns up (down)
+        valid = numpy.isfinite(average_short)
+        step = numpy.where(average_short > _shift(average_short), 1, -1)
+        step[~(valid & _shift(valid, fill=False))] = 0
+        previous_step = _shift(step, fill=0)
+        turn_up = (step == 1) & (previous_step != 1)
+        turn_down = (step == -1) & (previous_step != -1)
+
+        more = capacity > _shift(capacity)
+        less = capacity < _shift(capacity)
+        self.buy_rules = numpy.array(
+            [
+                more & (price > open),
+                less & (price > _shift(open)),
+                turn_up,
+                average_short > average_long,
+            ]
+        )
+        self.sell_rules = numpy.array(
+            [
+                more & (price < open),
+                less & (price < _shift(open)),
+                turn_down,
+                average_short < average_long,
+            ]
+        )
+        self.buy_pivots = self._rolling_pivot(bias, False)
+        self.sell_pivots = self._rolling_pivot(bias, True)
+
+        buy_gate = self.ready & self.buy_pivots if use_pivot else self.ready
+        sell_gate = self.ready & self.sell_pivots if use_pivot else self.ready
+        self.buy = self.buy_rules.any(0) & buy_gate
+        # best_four_point prefers a buy over a sell of the same day
+        self.sell = self.sell_rules.any(0) & sell_gate & ~self.buy
+
+    def _rolling_pivot(self, bias, position):
+        """Pivot flag of the last sample_size bias values of every day"""
+        pivots = self.matrix.rolling_pivot(bias, self.sample_size, position)[0]
+        return pivots & self.ready
+
+    def forward_returns(self, horizon: int):
+        """Return price[t + horizon] / price[t] - 1 of every day, NaN at the end"""
+        if horizon < 1:
+            raise ValueError("horizon should be a positive integer")
+        price = self.matrix.price
+        result = numpy.full(price.shape, numpy.nan)
+        if horizon < price.shape[1]:
+            result[:, :-horizon] = price[:, horizon:] / price[:, :-horizon] - 1
+        return result
+
+    def summary(self, horizons=(1, 5, 20)):
+        """Return a Summary of the buy and sell signals per horizon
+
+        win_rate is the share of signals followed by a move in the signal's
+        direction, days without a forward price are left out.
+        """
+        result = []
+        for horizon in horizons:
+            returns = self.forward_returns(horizon)
+            for signal, mask, sign in (("buy", self.buy, 1), ("sell", self.sell, -1)):
+                values = returns[mask & numpy.isfinite(returns)]
+                count = len(values)
+                result.append(
+                    Summary(
+                        signal,
+                        horizon,
+                        count,
+                        float(values.mean()) if count else None,
+                        float((values * sign > 0).mean()) if count else None,
+                    )
+                )
+        return result
+
+
+def backtest(stocks, **kwargs):
+    """Backtest of Stock objects, see Backtest for kwargs"""
+    return Backtest(StockMatrix.from_stocks(stocks), **kwargs)
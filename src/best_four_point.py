@@ -4,6 +4,7 @@ import io
 import sys
 # import twstock
 from analytics import *
+from screener import screen
 from stock import *
 
 # XXX: Repalce sys.stdout prevent Windows UnicodeEncodeError on cmd.exe
@@ -15,10 +16,9 @@ stdout = io.TextIOWrapper(
 def run(argv):
     print("四大買賣點判斷 Best Four Point", file=stdout)
     print("------------------------------", file=stdout)
-    for sid in argv:
-        bfp = BestFourPoint(Stock(sid))
-        bfp = bfp.best_four_point()
-        print("%s: " % (sid), end="", file=stdout)
+    for signal in screen([Stock(sid) for sid in argv]):
+        bfp = signal.best_four_point()
+        print("%s: " % (signal.sid), end="", file=stdout)
         if bfp:
             if bfp[0]:
                 print("Buy  ", bfp[1], file=stdout)
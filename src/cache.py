@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+#
+# Usage: Persistent month cache for TWSE/TPEX historical data
+#
+# Closed months never change, so a month written after it closed is kept
+# forever. A month written before it closed, the current month or a partial
+# one, keeps receiving new rows and is only trusted for `current_month_ttl`
+# seconds.
+#
+# Only the purified rows are stored, fetchers return a hit as the normalized
+# {"stat": "OK", "data": StockData} rather than the raw report payload.
+#
+
+import abc
+import datetime
+import json
+import os
+import tempfile
+import time
+
+
+class MonthCache(abc.ABC):
+    @abc.abstractmethod
+    def get(self, market, sid, year, month):
+        return NotImplemented
+
+    @abc.abstractmethod
+    def set(self, market, sid, year, month, rows):
+        return NotImplemented
+
+
+class NoMonthCache(MonthCache):
+    def get(self, market, sid, year, month):
+        return None
+
+    def set(self, market, sid, year, month, rows):
+        pass
+
+
+class FileMonthCache(MonthCache):
+    """Store purified month rows as JSON files under `path`.
+
+    Files are laid out as `<path>/<market>/<sid>/<year><month>.json`, the
+    first field of each row (the trading date) is kept as `YYYY-MM-DD`.
+    """
+
+    DATE_FORMAT = "%Y-%m-%d"
+
+    def __init__(self, path, current_month_ttl: int = 30 * 60):
+        self.path = os.path.expanduser(path)
+        self.current_month_ttl = current_month_ttl
+
+    def _month_path(self, market, sid, year, month):
+        return os.path.join(self.path, market, sid, "%d%02d.json" % (year, month))
+
+    def _month_end(self, year, month):
+        """Return the timestamp of the first day of the next month"""
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return datetime.datetime(year, month, 1).timestamp()
+
+    def get(self, market, sid, year, month):
+        path = self._month_path(market, sid, year, month)
+        try:
+            mtime = os.path.getmtime(path)
+            if (
+                mtime < self._month_end(year, month)
+                and time.time() - mtime > self.current_month_ttl
+            ):
+                return None
+            with open(path, encoding="utf_8") as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        for row in rows:
+            row[0] = datetime.datetime.strptime(row[0], self.DATE_FORMAT)
+        return rows
+
+    def set(self, market, sid, year, month, rows):
+        path = self._month_path(market, sid, year, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        rows = [[row[0].strftime(self.DATE_FORMAT)] + list(row[1:]) for row in rows]
+
+        # Write to a temporary file first so that concurrent readers never
+        # see a partially written month
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf_8") as f:
+                json.dump(rows, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+_cache_instance = NoMonthCache()
+
+
+def reset_month_cache():
+    configure_month_cache(NoMonthCache())
+
+
+def configure_month_cache(cache_instance):
+    global _cache_instance
+    if not isinstance(cache_instance, MonthCache):
+        raise BaseException("month cache should be a MonthCache object")
+    _cache_instance = cache_instance
+
+
+def get_month_cache():
+    return _cache_instance
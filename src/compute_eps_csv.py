@@ -3,6 +3,7 @@ import pandas as pd
 import os
 import traceback
 from analytics import *
+from screener import screen
 from stock import *
 
 # Parameters
@@ -50,28 +51,32 @@ def analyze_stocks(filtered_stocks):
     quarter_column = '財報季度'
     eps_column = 'EPS(元) ▼'
     
+    stocks = []
+    rows = {}
     for index, row in filtered_stocks.iterrows():
         stock_idx = row[idx_column][2:-1]  # Remove leading '="' and trailing '"'
         
         try:
-            stock = Stock(stock_idx)
-            bfp = BestFourPoint(stock)
-            buy_signal = bfp.best_four_point_to_buy()
-            
-            if buy_signal:
-                stock_eps = row[eps_column]
-                quarter_current = row[quarter_column]
-                stock_name = row[name_column]
-                print(f"You can buy the stock #{stock_idx} (closing price {stock.price[-1]} on {stock.date[-1]}) because {buy_signal}.")
-                
-                buy_list.append(int(stock_idx))
-                output_data.append([stock_idx, stock_name, stock.price[-1], stock.date[-1], buy_signal, stock_eps, quarter_current])
-        
+            stocks.append(Stock(stock_idx))
+            rows[stock_idx] = row
         except Exception as e:
             print(f'Error occurs for the stock #{stock_idx}')
             print(e)
             traceback.print_exc()
 
+    for signal in screen(stocks):
+        buy_signal = signal.buy_reason
+        if buy_signal:
+            stock_idx = signal.sid
+            row = rows[stock_idx]
+            stock_eps = row[eps_column]
+            quarter_current = row[quarter_column]
+            stock_name = row[name_column]
+            print(f"You can buy the stock #{stock_idx} (closing price {signal.price} on {signal.date}) because {buy_signal}.")
+
+            buy_list.append(int(stock_idx))
+            output_data.append([stock_idx, stock_name, signal.price, signal.date, buy_signal, stock_eps, quarter_current])
+
     return buy_list, output_data
 
 def save_output(output_data):
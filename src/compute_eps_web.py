@@ -2,11 +2,13 @@
 
 # https://gist.github.com/gary136/20970376b341f4199979a4570db5a113
 
-import requests
 import pandas as pd
 from io import StringIO
 from datetime import datetime, timedelta
 
+from proxy import get_proxies
+from session import get_session_pool
+
 def revr(data, nmbr):
     cols = data.columns.tolist()
     cols = cols[nmbr:] + cols[:nmbr]
@@ -16,7 +18,7 @@ def revr(data, nmbr):
 def siiPrice(str_date):
     url = f'https://www.twse.com.tw/exchangeReport/MI_INDEX?response=csv&date={str_date}&type=ALL'
     print(url)
-    r = requests.get(url)
+    r = get_session_pool().get(url, proxies=get_proxies())
     if r.text=='':
         return None
     
@@ -31,7 +33,7 @@ def siiPrice(str_date):
 
 def otcPrice(str_date):
     url = f'https://www.tpex.org.tw/web/stock/aftertrading/otc_quotes_no1430/stk_wn1430_result.php?l=zh-tw&o=htm&d={str_date}&se=AL&s=0,asc,0'
-    r = requests.get(url)
+    r = get_session_pool().get(url, proxies=get_proxies())
     if r.text=='':
         return None
 
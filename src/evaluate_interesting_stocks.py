@@ -2,8 +2,9 @@
 import pandas as pd
 import os
 import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 from analytics import *
+from screener import screen
 from stock import *
 
 # Parameters
@@ -23,44 +24,47 @@ def load_data(file_path):
 def get_stock_id_list(pandas_data):
     return pandas_data[stockID_column_name].to_numpy()
 
-def analyze_single_stock(stock_idx, stock_set):
-    """Analyze a single stock and return the result."""
+def fetch_single_stock(stock_idx):
+    """Fetch a single stock, None when it fails."""
     try:
-        stock = Stock(str(stock_idx))
-        bfp = BestFourPoint(stock)
-        buy_signal = bfp.best_four_point_to_buy()
-
-        if buy_signal:
-            current_stock_info = stock_set[stock_set[stockID_column_name] == stock_idx]
-            print(f"You can buy the stock #{stock_idx} (closing price {stock.price[-1]} on {stock.date[-1]}) because {buy_signal}.")
-
-            return (int(stock_idx),
-                    current_stock_info.iloc[0]['name'],
-                    stock.price[-1],
-                    stock.date[-1],
-                    buy_signal,
-                    current_stock_info.iloc[0]['volume'],
-                    current_stock_info.iloc[0]['EPS_quater_newest'],
-                    current_stock_info.iloc[0]['pe_ratio'])
+        return Stock(str(stock_idx))
     except Exception as e:
         print(f'Error occurs for the stock #{stock_idx}')
         print(e)
         traceback.print_exc()
     return None
 
+def analyze_single_stock(stock_idx, signal, stock_set):
+    """Return the output row of a screened stock, None when it is no buy."""
+    buy_signal = signal.buy_reason
+    if buy_signal:
+        current_stock_info = stock_set[stock_set[stockID_column_name] == stock_idx]
+        print(f"You can buy the stock #{stock_idx} (closing price {signal.price} on {signal.date}) because {buy_signal}.")
+
+        return (int(stock_idx),
+                current_stock_info.iloc[0]['name'],
+                signal.price,
+                signal.date,
+                buy_signal,
+                current_stock_info.iloc[0]['volume'],
+                current_stock_info.iloc[0]['EPS_quater_newest'],
+                current_stock_info.iloc[0]['pe_ratio'])
+    return None
+
 def analyze_stocks(filtered_stocks, stock_set):
-    """Analyze stocks in parallel and determine which ones to buy."""
+    """Fetch stocks in parallel, then screen them all at once to determine which ones to buy."""
     output_data = []
     buy_list = []
 
     with ThreadPoolExecutor(max_workers=7) as executor:
-        future_to_stock = {executor.submit(analyze_single_stock, stock_idx, stock_set): stock_idx for stock_idx in filtered_stocks}
-
-        for future in as_completed(future_to_stock):
-            result = future.result()
-            if result:
-                buy_list.append(result[0])
-                output_data.append(result)
+        stocks = [stock for stock in executor.map(fetch_single_stock, filtered_stocks) if stock is not None]
+
+    stock_indexes = {str(stock_idx): stock_idx for stock_idx in filtered_stocks}
+    for signal in screen(stocks):
+        result = analyze_single_stock(stock_indexes[signal.sid], signal, stock_set)
+        if result:
+            buy_list.append(result[0])
+            output_data.append(result)
 
     return buy_list, output_data
 
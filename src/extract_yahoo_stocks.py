@@ -6,6 +6,8 @@ import pandas as pd
 import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from throttle import THROTTLE_STATUS_CODES, get_rate_limiter
+
 class StockDataFetcher:
     def __init__(self, stock_ids, names):
         self.stocks = {stock_id: [stock_id] for stock_id in stock_ids}
@@ -28,6 +30,17 @@ class StockDataFetcher:
                 if count % 10 == 0:
                     logging.info(f"Fetching data ... {count} / {len(self.stocks)}")
 
+    def get(self, url):
+        """GET url through the shared rate limiter"""
+        limiter = get_rate_limiter()
+        limiter.acquire(url)
+        response = self.session.get(url)
+        if response.status_code in THROTTLE_STATUS_CODES:
+            limiter.throttled(url)
+        else:
+            limiter.succeeded(url)
+        return response
+
     def fetch_data(self, stock_id):
         eps_data = self.fetch_eps(stock_id)
         if eps_data:
@@ -40,7 +53,7 @@ class StockDataFetcher:
         url = self.url_eps.format(stock_id)
         eps_data = []
         try:
-            response = self.session.get(url)
+            response = self.get(url)
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'html.parser')
             eps_data = self.extract_eps_data(soup)
@@ -84,7 +97,7 @@ class StockDataFetcher:
         url = self.url_revenue.format(stock_id)
         revenue_data = []
         try:
-            response = self.session.get(url)
+            response = self.get(url)
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'html.parser')
             revenue_data = self.extract_revenue_data(soup)
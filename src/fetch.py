@@ -10,10 +10,10 @@ import os
 import csv
 from collections import namedtuple
 
-import requests
 from lxml import etree
 
 from proxy import get_proxies
+from session import get_session_pool
 
 TWSE_EQUITIES_URL = "https://isin.twse.com.tw/isin/C_public.jsp?strMode=2"
 TPEX_EQUITIES_URL = "https://isin.twse.com.tw/isin/C_public.jsp?strMode=4"
@@ -28,7 +28,7 @@ def make_row_tuple(typ, row):
 
 
 def fetch_data(url):
-    r = requests.get(url, proxies=get_proxies())
+    r = get_session_pool().get(url, proxies=get_proxies())
     root = etree.HTML(r.text)
     trs = root.xpath("//tr")[1:]
 
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+#
+# Usage: Fetch one trading day of every listed (TWSE) or OTC (TPEX) security
+#
+# TWSE MI_INDEX and TPEX stk_wn1430 return the whole market for a date in
+# one request, so per-stock histories can be built from a range of daily
+# snapshots with 2 requests per trading day instead of 1 per stock and month.
+#
+
+import datetime
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from session import fetch_json
+from stock import DATATUPLE, TWSE_BASE_URL, TPEX_BASE_URL, ReportURLMixin, Stock
+from stock import StockData
+
+try:
+    from csv_reader import codes
+except ImportError:
+    from codes import codes
+
+
+def _to_int(value):
+    try:
+        return int(value.replace(",", ""))
+    except (AttributeError, ValueError):
+        return None
+
+
+def _to_float(value):
+    try:
+        return float(value.replace(",", ""))
+    except (AttributeError, ValueError):
+        return None
+
+
+def _tables(data):
+    """Yield (fields, rows) of every table in a report payload"""
+    for table in data.get("tables") or []:
+        yield table.get("fields") or [], table.get("data") or []
+    for key in data:
+        if key.startswith("fields") and "data" + key[len("fields") :] in data:
+            yield data[key], data["data" + key[len("fields") :]]
+
+
+class BaseSnapshotFetcher(ReportURLMixin):
+    MARKET = ""
+    # Columns of the quote table, matched against its stripped field names
+    FIELDS = {}
+
+    def fetch(self, date: datetime.date, retry: int = 5):
+        """Return {sid: DATATUPLE} of date, empty when the market is closed"""
+        data = fetch_json(self.report_url, self._make_params(date), retry)
+        if data is None:
+            # Fail in all retries
+            return {}
+        return self.purify(date, data)
+
+    def _make_params(self, date):
+        pass
+
+    def _find_table(self, data):
+        for fields, rows in _tables(data):
+            fields = [f.strip() for f in fields]
+            if all(name in fields for name in self.FIELDS.values()):
+                return {k: fields.index(name) for k, name in self.FIELDS.items()}, rows
+        return None, []
+
+    def _make_datatuple(self, date, row, index):
+        pass
+
+    def purify(self, date, data):
+        index, rows = self._find_table(data)
+        if index is None:
+            return {}
+        date = datetime.datetime(date.year, date.month, date.day)
+        return {
+            row[index["sid"]].strip(): self._make_datatuple(date, row, index)
+            for row in rows
+        }
+
+
+class TWSESnapshotFetcher(BaseSnapshotFetcher):
+    MARKET = "twse"
+    REPORT_URL = urllib.parse.urljoin(TWSE_BASE_URL, "exchangeReport/MI_INDEX")
+    FIELDS = {
+        "sid": "證券代號",
+        "capacity": "成交股數",
+        "transaction": "成交筆數",
+        "turnover": "成交金額",
+        "open": "開盤價",
+        "high": "最高價",
+        "low": "最低價",
+        "close": "收盤價",
+        "sign": "漲跌(+/-)",
+        "change": "漲跌價差",
+    }
+
+    def _make_params(self, date):
+        return {
+            "response": "json",
+            "date": date.strftime("%Y%m%d"),
+            "type": "ALLBUT0999",
+        }
+
+    def _make_datatuple(self, date, row, index):
+        # 漲跌(+/-) is an html snippet, +/-/X表示漲/跌/不比價
+        change = _to_float(row[index["change"]])
+        if "X" in row[index["sign"]]:
+            change = 0.0
+        elif "-" in row[index["sign"]] and change is not None:
+            change = -change
+        return DATATUPLE(
+            date,
+            _to_int(row[index["capacity"]]),
+            _to_int(row[index["turnover"]]),
+            _to_float(row[index["open"]]),
+            _to_float(row[index["high"]]),
+            _to_float(row[index["low"]]),
+            _to_float(row[index["close"]]),
+            change,
+            _to_int(row[index["transaction"]]),
+        )
+
+
+class TPEXSnapshotFetcher(BaseSnapshotFetcher):
+    MARKET = "tpex"
+    REPORT_URL = urllib.parse.urljoin(
+        TPEX_BASE_URL, "web/stock/aftertrading/otc_quotes_no1430/stk_wn1430_result.php"
+    )
+    FIELDS = {
+        "sid": "代號",
+        "close": "收盤",
+        "change": "漲跌",
+        "open": "開盤",
+        "high": "最高",
+        "low": "最低",
+        "capacity": "成交股數",
+        "turnover": "成交金額(元)",
+        "transaction": "成交筆數",
+    }
+    # Column order of the legacy aaData payload which has no field names
+    AADATA_INDEX = {
+        "sid": 0,
+        "close": 2,
+        "change": 3,
+        "open": 4,
+        "high": 5,
+        "low": 6,
+        "capacity": 8,
+        "turnover": 9,
+        "transaction": 10,
+    }
+
+    def _make_params(self, date):
+        return {
+            "l": "zh-tw",
+            "o": "json",
+            "d": "%d/%02d/%02d" % (date.year - 1911, date.month, date.day),
+            "se": "AL",
+        }
+
+    def _find_table(self, data):
+        if data.get("aaData"):
+            return self.AADATA_INDEX, data["aaData"]
+        return super()._find_table(data)
+
+    def _make_datatuple(self, date, row, index):
+        # Unlike st43, stk_wn1430 reports capacity in shares already
+        return DATATUPLE(
+            date,
+            _to_int(row[index["capacity"]]),
+            _to_int(row[index["turnover"]]),
+            _to_float(row[index["open"]]),
+            _to_float(row[index["high"]]),
+            _to_float(row[index["low"]]),
+            _to_float(row[index["close"]]),
+            _to_float(row[index["change"]]),
+            _to_int(row[index["transaction"]]),
+        )
+
+
+def _date_iter(start, end):
+    """Yield weekdays from start to end, holidays are skipped by the fetch"""
+    for days in range((end - start).days + 1):
+        date = start + datetime.timedelta(days=days)
+        if date.weekday() < 5:
+            yield date
+
+
+def fetch_snapshots(start, end=None, fetchers=None, workers: int = 1):
+    """Fetch daily snapshots from start to end (default today)
+
+    Return a chronological list of (date, {sid: DATATUPLE}) where the
+    snapshots of every fetcher are merged, closed days are dropped.
+    """
+    end = end or datetime.date.today()
+    fetchers = fetchers or [TWSESnapshotFetcher(), TPEXSnapshotFetcher()]
+    dates = list(_date_iter(start, end))
+
+    def fetch_date(date):
+        snapshot = {}
+        for fetcher in fetchers:
+            snapshot.update(fetcher.fetch(date))
+        return date, snapshot
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            snapshots = list(executor.map(fetch_date, dates))
+    else:
+        snapshots = [fetch_date(date) for date in dates]
+    return [(date, snapshot) for date, snapshot in snapshots if snapshot]
+
+
+def build_histories(snapshots, sids=None):
+    """Turn snapshots into {sid: StockData}, optionally only for sids"""
+    histories = {}
+    for date, snapshot in snapshots:
+        for sid, row in snapshot.items():
+            if sids is None or sid in sids:
+                histories.setdefault(sid, []).append(row)
+    return {sid: StockData(rows) for sid, rows in histories.items()}
+
+
+def build_stocks(snapshots, sids=None):
+    """Turn snapshots into {sid: Stock} without any per-stock request"""
+    stocks = {}
+    for sid, data in build_histories(snapshots, sids).items():
+        if sid not in codes:
+            continue
+        stock = Stock(sid, initial_fetch=False)
+        stock.data = data
+        stocks[sid] = stock
+    return stocks
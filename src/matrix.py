@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+#
+# Usage: Analytics of many stocks at once over a stocks x days matrix
+#
+# Every row of a StockMatrix is a stock and every column a trading day,
+# missing values are NaN. The methods mirror analytics.Analytics but work on
+# whole matrices, so screening the market is a few numpy passes instead of a
+# Python loop per stock. numpy is optional, it is only required here.
+#
+
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from analytics import ROUNDING_TOLERANCE
+from stock import DATATUPLE, StockData, _FIELD_TYPECODES, _INT_NONE, _decode_dates
+
+FIELDS = DATATUPLE._fields[1:]
+# The builtin sum adds floats one by one before Python 3.12, which numpy can
+# replay, later versions use a compensated sum that is only called as is
+SEQUENTIAL_SUM = sys.version_info < (3, 12)
+
+
+def _round2(values):
+    """Return round(value, 2) of every value, including its half-even ties"""
+    scaled = values * 100
+    # Dekker's product, values * 100 is exactly scaled + error
+    split = values * 134217729.0
+    high = split - (split - values)
+    error = (high * 100 - scaled) + (values - high) * 100
+    floor = numpy.floor(scaled)
+    fraction = scaled - floor - 0.5
+    up = numpy.where(fraction == -error, floor % 2 == 1, fraction > -error)
+    result = numpy.where(numpy.abs(fraction) < 0.25, floor + up, numpy.rint(scaled))
+    return numpy.copysign(result / 100, values)
+
+
+def _concat_column(histories, name):
+    """Return field name of every StockData of histories, one after another,
+    straight from their typed columns"""
+    dtype = numpy.int64 if _FIELD_TYPECODES[name] == "q" else numpy.float64
+    parts = [numpy.frombuffer(data._columns[name], dtype) for data in histories]
+    return numpy.concatenate(parts) if parts else numpy.empty(0, dtype)
+
+
+def _builtin_sums(data, rows, cols, days):
+    """Return sum(data[row, col : col + days]) exactly as the builtin does"""
+    if SEQUENTIAL_SUM:
+        sums = numpy.zeros(len(rows))
+        for offset in range(days):
+            sums += data[rows, cols + offset]
+        return sums
+    windows = data[rows[:, None], cols[:, None] + numpy.arange(days)]
+    return numpy.array([sum(w) for w in windows.tolist()], dtype=float)
+
+
+def _rolling_argmax(values, days):
+    """Return (maxima, offsets) of every days window of the rows of values
+
+    van Herk/Gil-Werman: within blocks of days columns, a prefix and a
+    suffix running maximum cover any window with two lookups, so the cost
+    does not depend on days. offsets locate the first maximum of each
+    window from its start. values should not hold NaN.
+    """
+    rows, width = values.shape
+    blocks = -(-width // days)
+    padded = numpy.full((rows, blocks * days), -numpy.inf)
+    padded[:, :width] = values
+    padded = padded.reshape(rows, blocks, days)
+    columns = numpy.arange(blocks * days).reshape(blocks, days)
+
+    # Prefix maxima and the first column reaching them
+    prefix = numpy.maximum.accumulate(padded, 2)
+    record = numpy.ones(padded.shape, dtype=bool)
+    record[..., 1:] = padded[..., 1:] > prefix[..., :-1]
+    prefix_at = numpy.maximum.accumulate(numpy.where(record, columns, -1), 2)
+    # Suffix maxima and the first column reaching them
+    suffix = numpy.maximum.accumulate(padded[..., ::-1], 2)[..., ::-1]
+    record[...] = True
+    record[..., :-1] = padded[..., :-1] >= suffix[..., 1:]
+    suffix_at = numpy.minimum.accumulate(
+        numpy.where(record, columns, blocks * days)[..., ::-1], 2
+    )[..., ::-1]
+
+    count = width - days + 1
+    prefix, prefix_at = (
+        a.reshape(rows, -1)[:, days - 1 : days - 1 + count] for a in (prefix, prefix_at)
+    )
+    suffix, suffix_at = (a.reshape(rows, -1)[:, :count] for a in (suffix, suffix_at))
+    left = suffix >= prefix
+    maxima = numpy.where(left, suffix, prefix)
+    offsets = numpy.where(left, suffix_at, prefix_at) - numpy.arange(count)
+    return maxima, offsets
+
+
+def _rolling(data, days, maximum):
+    data = numpy.asarray(data, dtype=float)
+    if days < 1:
+        raise ValueError("days should be a positive integer")
+    result = numpy.full(data.shape, numpy.nan)
+    if data.shape[1] < days:
+        return result
+    valid = numpy.isfinite(data)
+    values = numpy.where(valid, data, -numpy.inf)
+    if not maximum:
+        values = numpy.where(valid, -data, -numpy.inf)
+    extremes = _rolling_argmax(values, days)[0]
+    gaps = numpy.hstack((numpy.zeros((len(data), 1)), numpy.cumsum(~valid, 1)))
+    complete = gaps[:, days:] == gaps[:, :-days]
+    result[:, days - 1 :] = numpy.where(
+        complete, extremes if maximum else -extremes, numpy.nan
+    )
+    return result
+
+
+class MatrixAnalytics(object):
+    def moving_average(self, data, days):
+        """Return the moving averages of every row, right aligned with data
+
+        Column j averages columns j - days + 1 .. j, windows reaching out of
+        the row or over a NaN are NaN. Values are rounded exactly like
+        Analytics.moving_average.
+        """
+        if days < 1:
+            raise ValueError("days should be a positive integer")
+        data = numpy.asarray(data, dtype=float)
+        result = numpy.full(data.shape, numpy.nan)
+        width = data.shape[1] - days + 1
+        if width <= 0:
+            return result
+
+        valid = numpy.isfinite(data)
+        zeros = numpy.zeros((data.shape[0], 1))
+        cumsum = numpy.hstack((zeros, numpy.cumsum(numpy.where(valid, data, 0), 1)))
+        gaps = numpy.hstack((zeros, numpy.cumsum(~valid, 1)))
+        scaled = (cumsum[:, days:] - cumsum[:, :-days]) / days * 100
+        complete = gaps[:, days:] == gaps[:, :-days]
+
+        # Means near a rounding tie, or whose sign of zero depends on the
+        # summation order, are recomputed one by one
+        eps = numpy.finfo(float).eps
+        error = 4 * eps * data.shape[1] * numpy.abs(cumsum).max(1, keepdims=True)
+        tolerance = ROUNDING_TOLERANCE * numpy.abs(scaled) + error / days * 100
+        ties = numpy.abs(scaled - numpy.floor(scaled) - 0.5) < tolerance
+        ties |= numpy.abs(scaled) < 1
+
+        means = result[:, days - 1 :]
+        means[complete] = numpy.rint(scaled[complete]) / 100
+        rows, cols = numpy.nonzero(ties & complete)
+        if len(rows):
+            means[rows, cols] = _round2(_builtin_sums(data, rows, cols, days) / days)
+        return result
+
+    def ma_bias_ratio(self, day1, day2):
+        """Calculate moving average bias ratio of every row"""
+        return self.moving_average(self.price, day1) - self.moving_average(
+            self.price, day2
+        )
+
+    def continuous(self, data):
+        """Return the signed length of the last run of every row
+
+        Only the trailing values without NaN of a row are considered, rows
+        with less than 2 of them are 0.
+        """
+        data = numpy.asarray(data, dtype=float)
+        if data.shape[1] < 2:
+            return numpy.zeros(data.shape[0], dtype=int)
+        valid = numpy.isfinite(data)
+        diff = numpy.where(data[:, 1:] > data[:, :-1], 1, -1)
+        diff[~(valid[:, 1:] & valid[:, :-1])] = 0
+        last = diff[:, -1]
+        run = numpy.cumprod((diff == last[:, None])[:, ::-1], 1).sum(1)
+        return numpy.where(last == 0, 0, run * last)
+
+    def rolling_max(self, data, days):
+        """Return the maximum of every days window, right aligned like
+        moving_average"""
+        return _rolling(data, days, True)
+
+    def rolling_min(self, data, days):
+        """Return the minimum of every days window, right aligned like
+        moving_average"""
+        return _rolling(data, days, False)
+
+    def channel_width(self, days):
+        """Return the days high minus the days low of every day"""
+        return self.rolling_max(self.high, days) - self.rolling_min(self.low, days)
+
+    def new_highs(self, data, days):
+        """Return whether each value beats the days values before it"""
+        data = numpy.asarray(data, dtype=float)
+        highs = numpy.full(data.shape, numpy.nan)
+        highs[:, 1:] = self.rolling_max(data, days)[:, :-1]
+        return data > highs
+
+    def new_lows(self, data, days):
+        """Return whether each value is below the days values before it"""
+        data = numpy.asarray(data, dtype=float)
+        lows = numpy.full(data.shape, numpy.nan)
+        lows[:, 1:] = self.rolling_min(data, days)[:, :-1]
+        return data < lows
+
+    def ma_bias_ratio_pivot(self, data, sample_size=5, position=False):
+        """Calculate the pivot point of every row
+
+        Return (pivots, offsets, values) arrays like the tuple returned by
+        Analytics.ma_bias_ratio_pivot, NaN of the sample are skipped and
+        rows without any value give (False, -1, NaN).
+        """
+        sample = numpy.asarray(data, dtype=float)[:, -sample_size:]
+        return tuple(
+            a[:, -1] for a in self.rolling_pivot(sample, sample_size, position)
+        )
+
+    def rolling_pivot(self, data, sample_size=5, position=False):
+        """Return ma_bias_ratio_pivot of every prefix of every row
+
+        Column j of the (pivots, offsets, values) arrays is the pivot of
+        data[:, : j + 1].
+        """
+        data = numpy.asarray(data, dtype=float)
+        rows, width = data.shape
+        if not width:
+            return (
+                numpy.zeros((rows, 1), dtype=bool),
+                numpy.full((rows, 1), -1),
+                numpy.full((rows, 1), numpy.nan),
+            )
+        # Shorter samples of the first columns are padded with NaN
+        padded = numpy.hstack((numpy.full((rows, sample_size - 1), numpy.nan), data))
+        valid = numpy.isfinite(padded)
+        highest, highest_at = _rolling_argmax(
+            numpy.where(valid, padded, -numpy.inf), sample_size
+        )
+        if position is True:
+            values, index = highest, highest_at
+            pre_check = highest > 0
+        else:
+            lowest, index = _rolling_argmax(
+                numpy.where(valid, -padded, -numpy.inf), sample_size
+            )
+            values = -lowest
+            pre_check = highest < 0
+
+        # Analytics indexes into the sample without its leading NaN
+        columns = numpy.arange(padded.shape[1])
+        first_valid = numpy.minimum.accumulate(
+            numpy.where(valid, columns, padded.shape[1])[:, ::-1], 1
+        )[:, ::-1]
+        leading = numpy.minimum(first_valid[:, :width] - columns[:width], sample_size)
+        empty = leading == sample_size
+        index = index - leading
+        pivots = (sample_size - index < 4) & (index != sample_size - 1) & pre_check
+        offsets = sample_size - index - 1
+
+        pivots[empty] = False
+        offsets[empty] = -1
+        values[empty] = numpy.nan
+        return pivots, offsets, values
+
+
+class StockMatrix(MatrixAnalytics):
+    def __init__(self, sids, columns, dates=None):
+        """sids name the rows, columns maps DATATUPLE fields to 2-D arrays
+        and dates names the columns when they are aligned by date."""
+        if numpy is None:
+            raise ImportError("numpy is required for StockMatrix")
+        self.sids = list(sids)
+        self.columns = columns
+        self.dates = dates
+        self._index = {sid: i for i, sid in enumerate(self.sids)}
+
+    @classmethod
+    def from_histories(cls, histories, align: str = "tail"):
+        """Build a matrix of {sid: StockData}
+
+        With align "tail" the last value of every row is the latest value of
+        its stock, so each row is the stock's own history and the analytics
+        match Analytics on that stock. With align "date" the columns are the
+        union of every trading date, days a stock did not trade are NaN.
+        """
+        if numpy is None:
+            raise ImportError("numpy is required for StockMatrix")
+        if align not in ("tail", "date"):
+            raise ValueError("align should be 'tail' or 'date'")
+        histories = {
+            sid: data if isinstance(data, StockData) else StockData(data)
+            for sid, data in histories.items()
+        }
+        sids = list(histories)
+        data_of = [histories[sid] for sid in sids]
+        lengths = numpy.array([len(data) for data in data_of], dtype=numpy.intp)
+        # Every value goes to rows[k], cols[k] of the matrix
+        rows = numpy.repeat(numpy.arange(len(sids)), lengths)
+        if align == "tail":
+            dates = None
+            width = int(lengths.max(initial=0))
+            ends = numpy.cumsum(lengths)
+            cols = numpy.arange(len(rows)) + numpy.repeat(width - ends, lengths)
+        else:
+            unique, cols = numpy.unique(
+                _concat_column(data_of, "date"), return_inverse=True
+            )
+            dates = _decode_dates(unique.tolist())
+            width = len(dates)
+
+        columns = {}
+        for name in FIELDS:
+            values = _concat_column(data_of, name)
+            if values.dtype == numpy.int64:
+                missing = values == _INT_NONE
+                values = values.astype(float)
+                values[missing] = numpy.nan
+            matrix = numpy.full((len(sids), width), numpy.nan)
+            matrix[rows, cols] = values
+            columns[name] = matrix
+        return cls(sids, columns, dates)
+
+    @classmethod
+    def from_stocks(cls, stocks, align: str = "tail"):
+        """Build a matrix of Stock objects, see from_histories"""
+        return cls.from_histories({s.sid: s.data for s in stocks}, align)
+
+    def __len__(self):
+        return len(self.sids)
+
+    def index(self, sid):
+        """Return the row of sid"""
+        return self._index[sid]
+
+    @property
+    def capacity(self):
+        return self.columns["capacity"]
+
+    @property
+    def turnover(self):
+        return self.columns["turnover"]
+
+    @property
+    def price(self):
+        return self.columns["close"]
+
+    @property
+    def high(self):
+        return self.columns["high"]
+
+    @property
+    def low(self):
+        return self.columns["low"]
+
+    @property
+    def open(self):
+        return self.columns["open"]
+
+    @property
+    def close(self):
+        return self.columns["close"]
+
+    @property
+    def change(self):
+        return self.columns["change"]
+
+    @property
+    def transaction(self):
+        return self.columns["transaction"]
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+#
+# Usage: Declare the indicators rules need, compute each of them once
+#
+#   >>> close = column('close')
+#   >>> pipeline = Pipeline()
+#   >>> pipeline.add('trend', greater(last(moving_average(close, 3)),
+#   ...                               last(moving_average(close, 6))))
+#   >>> pipeline.add('bias', bias_ratio(3, 6))
+#   >>> pipeline.run(stock)
+#   {'trend': True, 'bias': [...]}
+#
+# Nodes are plain tuples compared by value, so two rules asking for the
+# moving average of the same column over the same days share one node, and
+# the plan evaluates every distinct node once, inputs first.
+#
+
+from collections import namedtuple
+
+from analytics import Analytics
+
+Node = namedtuple("Node", ["op", "inputs", "params"])
+
+
+def column(name):
+    """Node of a StockData column, e.g. 'close' or 'capacity'"""
+    return Node("column", (), (name,))
+
+
+def moving_average(series, days):
+    """Node of Analytics.moving_average of series"""
+    return Node("moving_average", (series,), (days,))
+
+
+def difference(series1, series2):
+    """Node of series1 - series2, aligned on their last values"""
+    return Node("difference", (series1, series2), ())
+
+
+def bias_ratio(day1, day2, series=None):
+    """Node of Analytics.ma_bias_ratio, of the close price by default"""
+    series = column("close") if series is None else series
+    return difference(moving_average(series, day1), moving_average(series, day2))
+
+
+def continuous(series):
+    """Node of Analytics.continuous of series"""
+    return Node("continuous", (series,), ())
+
+
+def pivot(series, sample_size=5, position=False):
+    """Node of Analytics.ma_bias_ratio_pivot of series"""
+    return Node("pivot", (series,), (sample_size, position))
+
+
+def last(series, offset=1):
+    """Node of series[-offset]"""
+    return Node("last", (series,), (offset,))
+
+
+def greater(node1, node2):
+    return Node("greater", (node1, node2), ())
+
+
+def less(node1, node2):
+    return Node("less", (node1, node2), ())
+
+
+def equal(node, value):
+    return Node("equal", (node,), (value,))
+
+
+def both(node1, node2):
+    return Node("both", (node1, node2), ())
+
+
+class Pipeline(object):
+    def __init__(self, outputs=None):
+        """Named nodes evaluated together, outputs maps names to nodes"""
+        self.outputs = {}
+        self._plan = None
+        for name, node in (outputs or {}).items():
+            self.add(name, node)
+
+    def add(self, name, node):
+        self.outputs[name] = node
+        self._plan = None
+        return node
+
+    def plan(self):
+        """Return every distinct node once, each after its inputs"""
+        if self._plan is None:
+            plan = {}
+
+            def visit(node):
+                if node not in plan:
+                    for child in node.inputs:
+                        visit(child)
+                    plan[node] = None
+
+            for node in self.outputs.values():
+                visit(node)
+            self._plan = list(plan)
+        return self._plan
+
+    def evaluate(self, source):
+        """Return {node: value} of the plan evaluated on source
+
+        source is a Stock or a StockData, columns of a StockData memoize
+        their indicators, so later runs on unchanged data are lookups.
+        """
+        data = getattr(source, "data", source)
+        analytics = source if isinstance(source, Analytics) else Analytics()
+        values = {}
+        for node in self.plan():
+            inputs = [values[child] for child in node.inputs]
+            if node.op == "column":
+                values[node] = data.column(*node.params)
+            else:
+                evaluate = getattr(self, "_" + node.op)
+                values[node] = evaluate(analytics, *inputs, *node.params)
+        return values
+
+    def run(self, source):
+        """Return {name: value} of every output evaluated on source"""
+        values = self.evaluate(source)
+        return {name: values[node] for name, node in self.outputs.items()}
+
+    @staticmethod
+    def _moving_average(analytics, series, days):
+        return analytics.moving_average(series, days)
+
+    @staticmethod
+    def _difference(analytics, series1, series2):
+        result = [
+            series1[-i] - series2[-i]
+            for i in range(1, min(len(series1), len(series2)) + 1)
+        ]
+        return result[::-1]
+
+    @staticmethod
+    def _continuous(analytics, series):
+        return analytics.continuous(series)
+
+    @staticmethod
+    def _pivot(analytics, series, sample_size, position):
+        return analytics.ma_bias_ratio_pivot(series, sample_size, position)
+
+    @staticmethod
+    def _last(analytics, series, offset):
+        return series[-offset]
+
+    @staticmethod
+    def _greater(analytics, value1, value2):
+        return value1 > value2
+
+    @staticmethod
+    def _less(analytics, value1, value2):
+        return value1 < value2
+
+    @staticmethod
+    def _equal(analytics, value, expected):
+        return value == expected
+
+    @staticmethod
+    def _both(analytics, value1, value2):
+        return value1 and value2
+
+
+def best_four_point_pipeline():
+    """Pipeline of the BestFourPoint rules and pivots, named after its methods"""
+    capacity, close, open = column("capacity"), column("close"), column("open")
+    average3 = moving_average(close, 3)
+    average6 = moving_average(close, 6)
+    trend = continuous(average3)
+    bias = bias_ratio(3, 6)
+    more = greater(last(capacity), last(capacity, 2))
+    fewer = less(last(capacity), last(capacity, 2))
+    return Pipeline(
+        {
+            "best_buy_1": both(more, greater(last(close), last(open))),
+            "best_buy_2": both(fewer, greater(last(close), last(open, 2))),
+            "best_buy_3": equal(trend, 1),
+            "best_buy_4": greater(last(average3), last(average6)),
+            "best_sell_1": both(more, less(last(close), last(open))),
+            "best_sell_2": both(fewer, less(last(close), last(open, 2))),
+            "best_sell_3": equal(trend, -1),
+            "best_sell_4": less(last(average3), last(average6)),
+            "plus_bias_ratio": pivot(bias, 5, True),
+            "mins_bias_ratio": pivot(bias, 5, False),
+        }
+    )
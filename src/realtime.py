@@ -1,17 +1,36 @@
 # -*- coding: utf-8 -*-
 
+import asyncio
 import datetime
 import json
+import math
+import threading
 import time
 import requests
 import sys
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.adapters import HTTPAdapter
 
 from proxy import get_proxies
 from csv_reader import twse
+from session import DEFAULT_HEADERS, MAX_CONNECTIONS_PER_HOST
+from throttle import THROTTLE_STATUS_CODES, get_rate_limiter, is_block_page
 
 SESSION_URL = "http://mis.twse.com.tw/stock/index.jsp"
 STOCKINFO_URL = "http://mis.twse.com.tw/stock/api/getStockInfo.jsp?ex_ch={stock_id}&_={time}"
 
+# Statuses of a getStockInfo.jsp request whose session cookie was refused
+REJECTED_STATUS_CODES = (401, 403)
+# Longer symbol lists are split into chunks of at most CHUNK_SIZE symbols
+# and MAX_EX_CH_LENGTH characters of ex_ch, fetched concurrently
+CHUNK_SIZE = 100
+MAX_EX_CH_LENGTH = 1500
+CHUNK_WORKERS = MAX_CONNECTIONS_PER_HOST
+# Seconds between two updates of the exchange's quotes, the stream cadence
+UPDATE_INTERVAL = 5
+
 # Toggle for mock data
 mock = False
 
@@ -19,38 +38,261 @@ mock = False
 def fetch_session():
     """Establish a session for requests."""
     session = requests.Session()
+    get_rate_limiter().acquire(SESSION_URL)
     session.get(SESSION_URL, proxies=get_proxies())
     return session
 
 
+class RealtimeClient(object):
+    def __init__(
+        self,
+        session_url: str = SESSION_URL,
+        stockinfo_url: str = STOCKINFO_URL,
+        pool_maxsize: int = MAX_CONNECTIONS_PER_HOST,
+    ):
+        """Long-lived client of getStockInfo.jsp
+
+        The index.jsp handshake is made once and its cookies are kept until
+        the server refuses them. Every thread gets its own requests.Session,
+        all of them share one cookie jar and one keep-alive connection pool.
+        """
+        self.session_url = session_url
+        self.stockinfo_url = stockinfo_url
+        self.cookies = requests.cookies.RequestsCookieJar()
+        self.handshakes = 0
+        self._adapter = HTTPAdapter(pool_maxsize=pool_maxsize, pool_block=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._warm = False
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            session.cookies = self.cookies
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            self._local.session = session
+        return session
+
+    def warm(self, handshakes=None):
+        """Make the index.jsp handshake unless the session is warm
+
+        handshakes is the handshake count seen by a caller whose request
+        was refused, a newer handshake of another thread is then reused.
+        """
+        with self._lock:
+            if self._warm and (handshakes is None or handshakes != self.handshakes):
+                return
+            self.cookies.clear()
+            get_rate_limiter().acquire(self.session_url)
+            self.session.get(self.session_url, proxies=get_proxies())
+            self.handshakes += 1
+            self._warm = True
+
+    def _request(self, stocks):
+        limiter = get_rate_limiter()
+        limiter.acquire(self.stockinfo_url)
+        return self.session.get(
+            self.stockinfo_url.format(
+                stock_id=join_stock_id(stocks), time=int(time.time()) * 1000
+            ),
+            proxies=get_proxies(),
+        )
+
+    def get_raw(self, stocks) -> dict:
+        """Fetch raw stock data, refreshing the cookies once if refused"""
+        limiter = get_rate_limiter()
+        try:
+            self.warm()
+            handshakes = self.handshakes
+            response = self._request(stocks)
+            if response.status_code in REJECTED_STATUS_CODES:
+                self.warm(handshakes)
+                response = self._request(stocks)
+            if response.status_code in THROTTLE_STATUS_CODES:
+                limiter.throttled(self.stockinfo_url)
+            response.raise_for_status()
+            data = response.json()
+        except json.JSONDecodeError:
+            # Throttled hosts, and some refused sessions, answer with html.
+            # Retries of get then start with a new handshake. Checked first,
+            # requests' JSONDecodeError is a RequestException as well
+            content_type = response.headers.get("Content-Type", "")
+            if is_block_page(response.status_code, content_type):
+                limiter.throttled(self.stockinfo_url)
+            with self._lock:
+                if self.handshakes == handshakes:
+                    self._warm = False
+            return {"rtmessage": "json decode error", "rtcode": "5000"}
+        except requests.RequestException as e:
+            return {"rtmessage": str(e), "rtcode": "5002"}  # Network error
+        limiter.succeeded(self.stockinfo_url)
+        return data
+
+    def close(self):
+        self._adapter.close()
+
+
 def format_stock_info(data) -> dict:
     """Format stock information into a structured dictionary."""
     result = {
         "timestamp": int(data["tlong"]) / 1000,
-        "info": {
-            "code": data["c"],
-            "channel": data["ch"],
-            "name": data["n"],
-            "fullname": data["nf"],
-            "time": datetime.datetime.fromtimestamp(int(data["tlong"]) / 1000).strftime("%Y-%m-%d %H:%M:%S"),
-        },
-        "realtime": {
-            "latest_trade_price": data.get("z"),
-            "trade_volume": data.get("tv"),
-            "accumulate_trade_volume": data.get("v"),
-            "best_bid_price": split_best(data.get("b")),
-            "best_bid_volume": split_best(data.get("g")),
-            "best_ask_price": split_best(data.get("a")),
-            "best_ask_volume": split_best(data.get("f")),
-            "open": data.get("o"),
-            "high": data.get("h"),
-            "low": data.get("l"),
-        },
+        "info": format_info(data),
+        "realtime": format_realtime(data),
         "success": True,
     }
     return result
 
 
+def format_info(data) -> dict:
+    return {
+        "code": data["c"],
+        "channel": data["ch"],
+        "name": data["n"],
+        "fullname": data["nf"],
+        "time": datetime.datetime.fromtimestamp(int(data["tlong"]) / 1000).strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def format_realtime(data) -> dict:
+    return {
+        "latest_trade_price": data.get("z"),
+        "trade_volume": data.get("tv"),
+        "accumulate_trade_volume": data.get("v"),
+        "best_bid_price": split_best(data.get("b")),
+        "best_bid_volume": split_best(data.get("g")),
+        "best_ask_price": split_best(data.get("a")),
+        "best_ask_volume": split_best(data.get("f")),
+        "open": data.get("o"),
+        "high": data.get("h"),
+        "low": data.get("l"),
+    }
+
+
+def _price(value) -> float:
+    # "-" is sent for prices without a trade or an order
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _volume(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _book(value, kind) -> tuple:
+    if not value:
+        return ()
+    levels = value.strip("_").split("_")
+    try:
+        return tuple(map(kind, levels))
+    except ValueError:
+        return tuple(_price(v) if kind is float else _volume(v) for v in levels)
+
+
+class Quote(Mapping):
+    """Quote of getStockInfo.jsp with its numbers parsed once
+
+    Prices are floats, nan without a trade, volumes are ints and the best
+    bids and asks are tuples. Quote is a read only mapping of the
+    format_stock_info dict, built on access, for the code reading
+    quote["realtime"]["latest_trade_price"].
+    """
+
+    __slots__ = (
+        "code",
+        "channel",
+        "name",
+        "fullname",
+        "tlong",
+        "price",
+        "trade_volume",
+        "volume",
+        "bid_prices",
+        "bid_volumes",
+        "ask_prices",
+        "ask_volumes",
+        "open",
+        "high",
+        "low",
+        "_data",
+    )
+
+    KEYS = ("timestamp", "info", "realtime", "success")
+    # Raw fields of a trade or of the book, compared by changed
+    MARKET_FIELDS = ("z", "tv", "v", "b", "g", "a", "f", "o", "h", "l")
+
+    def __init__(self, data: dict):
+        self.code = data["c"]
+        self.channel = data["ch"]
+        self.name = data["n"]
+        self.fullname = data["nf"]
+        self.tlong = int(data["tlong"])
+        self.price = _price(data.get("z"))
+        self.trade_volume = _volume(data.get("tv"))
+        self.volume = _volume(data.get("v"))
+        self.bid_prices = _book(data.get("b"), float)
+        self.bid_volumes = _book(data.get("g"), int)
+        self.ask_prices = _book(data.get("a"), float)
+        self.ask_volumes = _book(data.get("f"), int)
+        self.open = _price(data.get("o"))
+        self.high = _price(data.get("h"))
+        self.low = _price(data.get("l"))
+        self._data = data
+
+    @property
+    def timestamp(self) -> float:
+        return self.tlong / 1000
+
+    @property
+    def datetime(self):
+        return datetime.datetime.fromtimestamp(self.timestamp)
+
+    @property
+    def time(self) -> str:
+        return self.datetime.strftime("%Y-%m-%d %H:%M:%S")
+
+    def changed(self, other) -> bool:
+        """Tell whether the trade, bid or ask fields differ from other"""
+        data, last = self._data, other._data
+        return any(data.get(field) != last.get(field) for field in self.MARKET_FIELDS)
+
+    def to_dict(self) -> dict:
+        return format_stock_info(self._data)
+
+    def __getitem__(self, key):
+        if key == "timestamp":
+            return self.timestamp
+        if key == "info":
+            return format_info(self._data)
+        if key == "realtime":
+            return format_realtime(self._data)
+        if key == "success":
+            return True
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def __repr__(self):
+        return "Quote(code=%r, price=%r, volume=%r, time=%r)" % (
+            self.code,
+            self.price,
+            self.volume,
+            self.time,
+        )
+
+
 def split_best(d):
     """Split best bid/ask data."""
     return d.strip("_").split("_") if d else d
@@ -63,38 +305,164 @@ def join_stock_id(stocks) -> str:
     return f"{('tse' if stocks in twse else 'otc')}_{stocks}.tw"
 
 
+def chunk_stock_ids(stocks, size: int = CHUNK_SIZE):
+    """Split stocks into the fewest chunks within the size and ex_ch length
+    limits, of even sizes so that concurrent requests end together"""
+    stocks = list(dict.fromkeys(stocks))
+    length = len(join_stock_id(stocks))
+    count = max(
+        math.ceil(len(stocks) / size), math.ceil(length / MAX_EX_CH_LENGTH), 1
+    )
+    chunk, extra = divmod(len(stocks), count)
+    chunks, start = [], 0
+    for i in range(count):
+        end = start + chunk + (i < extra)
+        chunks.append(stocks[start:end])
+        start = end
+    return chunks
+
+
 def get_raw(stocks) -> dict:
     """Fetch raw stock data from the API."""
-    try:
-        session = fetch_session()
-        response = session.get(STOCKINFO_URL.format(stock_id=join_stock_id(stocks), time=int(time.time()) * 1000))
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        return {"rtmessage": str(e), "rtcode": "5002"}  # Network error
-    except json.JSONDecodeError:
-        return {"rtmessage": "json decode error", "rtcode": "5000"}
-
-
-def get(stocks, retry=3):
-    """Fetch and format stock information, with retry logic."""
+    return get_realtime_client().get_raw(stocks)
+
+
+def _get_chunks(chunks, retry, quotes):
+    workers = min(len(chunks), CHUNK_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda chunk: get(chunk, retry, quotes), chunks))
+    merged = {}
+    failed = []
+    for result in results:
+        if result.get("success") is not False:
+            merged.update(result)
+        failed.extend(result.get("failed", []))
+    # Failed chunks are left out, unless every chunk failed, and their codes
+    # are listed under "failed"
+    result = merged or results[0]
+    if failed:
+        result["failed"] = failed
+    return result
+
+
+def get(stocks, retry=3, quotes=False):
+    """Fetch and format stock information, with retry logic.
+
+    With quotes, stocks are returned as parsed Quote objects instead of
+    format_stock_info dicts.
+    """
+    if isinstance(stocks, list) and not mock:
+        chunks = chunk_stock_ids(stocks)
+        if len(chunks) > 1:
+            return _get_chunks(chunks, retry, quotes)
+
     data = get_raw(stocks) if not mock else mock.get(stocks)
     data["success"] = False  # Initialize success flag
 
     # Handle JSON decode error
     if data.get("rtcode") == "5000" and retry:
-        return get(stocks, retry - 1)
+        return get(stocks, retry - 1, quotes)
 
     # Check for empty response
     if "msgArray" not in data or not data["msgArray"]:
+        if data.get("rtcode") in ("5000", "5002"):
+            # The request failed, the codes may still have quotes
+            data["failed"] = stocks if isinstance(stocks, list) else [stocks]
         data["rtmessage"] = "Empty Query."
         data["rtcode"] = "5001"
         return data
 
     # Return formatted stock data
+    make = Quote if quotes else format_stock_info
     if isinstance(stocks, list):
-        return {info["code"]: format_stock_info(info) for info in data["msgArray"]}
-    return format_stock_info(data["msgArray"][0])
+        return {info["c"]: make(info) for info in data["msgArray"]}
+    return make(data["msgArray"][0])
+
+
+class QuoteDeltas(object):
+    def __init__(self):
+        """Keep the last quote of every code and tell which ones changed"""
+        self.quotes = {}
+
+    def update(self, quotes) -> dict:
+        """Return the Quotes of {code: quote} newer than the kept ones, by
+        tlong, whose trade, bid or ask fields changed"""
+        changed = {}
+        for code, quote in quotes.items():
+            if not isinstance(quote, Quote):
+                continue
+            last = self.quotes.get(code)
+            if last is not None and quote.tlong <= last.tlong:
+                continue
+            self.quotes[code] = quote
+            if last is None or quote.changed(last):
+                changed[code] = quote
+        return changed
+
+
+def _poll(stocks, deltas):
+    quotes = get(stocks, quotes=True)
+    if quotes.get("success") is False:
+        return {}
+    return deltas.update(quotes)
+
+
+def _next_poll(interval):
+    # Polls are aligned on the exchange's update interval
+    return interval - time.time() % interval
+
+
+def stream(stocks, interval: float = UPDATE_INTERVAL, polls: int = None):
+    """Poll stocks every interval seconds, yield {code: quote} of the
+    quotes that changed since the previous poll
+
+    The first poll yields every quote, polls without a change yield
+    nothing. polls bounds the number of polls, None polls forever.
+    """
+    stocks = list(stocks) if not isinstance(stocks, str) else [stocks]
+    deltas = QuoteDeltas()
+    count = 0
+    while polls is None or count < polls:
+        if count:
+            time.sleep(_next_poll(interval))
+        count += 1
+        changed = _poll(stocks, deltas)
+        if changed:
+            yield changed
+
+
+async def astream(stocks, interval: float = UPDATE_INTERVAL, polls: int = None):
+    """Async iterator version of stream, requests run in a thread"""
+    stocks = list(stocks) if not isinstance(stocks, str) else [stocks]
+    deltas = QuoteDeltas()
+    loop = asyncio.get_running_loop()
+    count = 0
+    while polls is None or count < polls:
+        if count:
+            await asyncio.sleep(_next_poll(interval))
+        count += 1
+        changed = await loop.run_in_executor(None, _poll, stocks, deltas)
+        if changed:
+            yield changed
+
+
+_client_instance = RealtimeClient()
+
+
+def reset_realtime_client():
+    configure_realtime_client(RealtimeClient())
+
+
+def configure_realtime_client(client_instance):
+    global _client_instance
+    if not isinstance(client_instance, RealtimeClient):
+        raise BaseException("realtime client should be a RealtimeClient object")
+    _client_instance.close()
+    _client_instance = client_instance
+
+
+def get_realtime_client():
+    return _client_instance
 
 
 def run(argv):
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+#
+# Usage: Record exchange responses and replay them from a local server
+#
+# Record once with network access:
+#
+#   >>> recorder = Recorder("fixtures")
+#   >>> configure_session_pool(SessionPool(response_hooks=[recorder]))
+#   >>> Stock("2330").fetch_from(2024, 1)
+#
+# Then replay offline, optionally with latency, errors and throttling:
+#
+#   >>> with ReplayServer("fixtures", latency=0.05) as server:
+#   ...     with redirect_fetchers(server.url):
+#   ...         print(benchmark(["2330"], 2024, 1))
+#
+
+import contextlib
+import hashlib
+import http.server
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+
+import market
+import stock
+from throttle import RateLimiter, configure_rate_limiter, get_rate_limiter
+
+# Query parameters that only defeat caches and never change the response
+IGNORED_PARAMS = ("_",)
+THROTTLE_BODY = "<html><body>THE PAGE CANNOT BE ACCESSED!</body></html>"
+
+
+def fixture_key(url):
+    """Return the fixture file name of url, independent of its host"""
+    parts = urllib.parse.urlsplit(url)
+    query = sorted(
+        (k, v)
+        for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if k not in IGNORED_PARAMS
+    )
+    key = parts.path.lstrip("/") + "?" + urllib.parse.urlencode(query)
+    return hashlib.sha1(key.encode("utf_8")).hexdigest() + ".json"
+
+
+class Recorder(object):
+    """requests response hook saving successful responses into directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, response, *args, **kwargs):
+        if response.status_code != 200:
+            return response
+        fixture = {
+            "url": response.url,
+            "content_type": response.headers.get("Content-Type", ""),
+            "body": response.text,
+        }
+        path = os.path.join(self.directory, fixture_key(response.url))
+        with open(path, "w", encoding="utf_8") as f:
+            json.dump(fixture, f, ensure_ascii=False)
+        return response
+
+
+class _ReplayHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server.replay
+        server.count_request()
+        if server.latency:
+            time.sleep(server.latency)
+
+        roll = server.random()
+        if roll < server.error_rate:
+            return self._send(500, "text/plain", "injected error")
+        if roll < server.error_rate + server.throttle_rate:
+            return self._send(server.throttle_status, "text/html", THROTTLE_BODY)
+
+        path = os.path.join(server.directory, fixture_key(self.path))
+        try:
+            with open(path, encoding="utf_8") as f:
+                fixture = json.load(f)
+        except OSError:
+            return self._send(404, "text/plain", "no fixture for %s" % self.path)
+        self._send(200, fixture["content_type"], fixture["body"])
+
+    def _send(self, status, content_type, body):
+        body = body.encode("utf_8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type or "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer(object):
+    def __init__(
+        self,
+        directory,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        throttle_status: int = 200,
+        seed=None,
+    ):
+        """Serve recorded fixtures on localhost. Every request waits latency
+        seconds, error_rate of them fail with HTTP 500 and throttle_rate of
+        them get an html page like a throttling exchange (with
+        throttle_status, 200 as TWSE does)."""
+        self.directory = directory
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.throttle_status = throttle_status
+        self.requests = 0
+        self._random = random.Random(seed)
+        # Handlers run in their own threads
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def random(self):
+        with self._lock:
+            return self._random.random()
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d/" % self._httpd.server_port
+
+    def start(self):
+        self._httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _ReplayHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.replay = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+FETCHERS = (
+    stock.TWSEFetcher,
+    stock.TPEXFetcher,
+    market.TWSESnapshotFetcher,
+    market.TPEXSnapshotFetcher,
+)
+
+
+@contextlib.contextmanager
+def redirect_fetchers(base_url, fetchers=FETCHERS):
+    """Send the requests of every fetcher class to base_url temporarily"""
+    original = [(f, f.__dict__.get("redirect_url")) for f in fetchers]
+    try:
+        for fetcher in fetchers:
+            fetcher.redirect_url = base_url
+        yield
+    finally:
+        for fetcher, redirect_url in original:
+            fetcher.redirect_url = redirect_url
+
+
+def benchmark(sids, year: int, month: int, workers: int = 1, limiter=None):
+    """Fetch and parse sids from year, month, return (rows, seconds, rows/s)
+
+    The process rate limiter is replaced by limiter while measuring, by
+    default one without a rate, so the fetch path is measured rather than
+    the request rate. Injected throttling still backs off.
+    """
+    previous = get_rate_limiter()
+    configure_rate_limiter(limiter or RateLimiter(rate=None))
+    try:
+        start = time.perf_counter()
+        rows = 0
+        for sid in sids:
+            rows += len(
+                stock.Stock(sid, initial_fetch=False).fetch_from(year, month, workers)
+            )
+        seconds = time.perf_counter() - start
+    finally:
+        configure_rate_limiter(previous)
+    return rows, seconds, rows / seconds if seconds else 0.0
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#
+# Usage: Evaluate BestFourPoint for a whole universe of stocks at once
+#
+#   >>> for signal in screen([Stock('2330'), Stock('6223')]):
+#   ...     print(signal.sid, signal.best_four_point())
+#
+# The rules run on a tail aligned StockMatrix, so a universe costs a few
+# numpy passes instead of eight rule evaluations per Stock. numpy is
+# required.
+#
+
+import copy
+import time
+from collections import namedtuple
+
+from analytics import BestFourPoint
+from matrix import StockMatrix, numpy
+from stock import StockData
+
+
+class Signal(
+    namedtuple(
+        "Signal",
+        [
+            "sid",
+            "date",
+            "price",
+            "buy",
+            "sell",
+            "buy_pivot",
+            "sell_pivot",
+            "buy_reason",
+            "sell_reason",
+        ],
+    )
+):
+    """One row of the screener table
+
+    buy and sell hold the four rule flags, buy_pivot and sell_pivot the
+    bias ratio pivots of the last 5 days. buy_reason and sell_reason are
+    what BestFourPoint.best_four_point_to_buy/sell return.
+    """
+
+    __slots__ = ()
+
+    def best_four_point(self):
+        """Same as BestFourPoint.best_four_point"""
+        if self.buy_reason:
+            return (True, self.buy_reason)
+        elif self.sell_reason:
+            return (False, self.sell_reason)
+        return None
+
+
+def _reasons(checks, why):
+    return [
+        ", ".join(w for w, check in zip(why, row) if check) if any(row) else False
+        for row in checks
+    ]
+
+
+def _last2(values):
+    # Last two columns, NaN where the matrix is narrower
+    tail = numpy.full((len(values), 2), numpy.nan)
+    width = min(2, values.shape[1])
+    if width:
+        tail[:, 2 - width :] = values[:, -width:]
+    return tail
+
+
+def screen_matrix(matrix, dates=None):
+    """Return a Signal per row of a tail aligned StockMatrix
+
+    dates are the latest dates of the rows, if known.
+    """
+    average3 = matrix.moving_average(matrix.price, 3)
+    average6 = matrix.moving_average(matrix.price, 6)
+    bias = average3 - average6
+    continuous = matrix.continuous(average3)
+    buy_pivots = matrix.ma_bias_ratio_pivot(bias, 5, False)[0]
+    sell_pivots = matrix.ma_bias_ratio_pivot(bias, 5, True)[0]
+
+    price, capacity, open = (
+        _last2(matrix.price),
+        _last2(matrix.capacity),
+        _last2(matrix.open),
+    )
+    average3, average6, bias = _last2(average3), _last2(average6), _last2(bias)
+    ready = numpy.isfinite(bias[:, -1])
+    more = capacity[:, -1] > capacity[:, -2]
+    less = capacity[:, -1] < capacity[:, -2]
+    buy = numpy.array(
+        [
+            more & (price[:, -1] > open[:, -1]),
+            less & (price[:, -1] > open[:, -2]),
+            continuous == 1,
+            average3[:, -1] > average6[:, -1],
+        ]
+    )
+    sell = numpy.array(
+        [
+            more & (price[:, -1] < open[:, -1]),
+            less & (price[:, -1] < open[:, -2]),
+            continuous == -1,
+            average3[:, -1] < average6[:, -1],
+        ]
+    )
+    # BestFourPoint gates on the truth of the pivot tuple, which is true
+    # whenever a bias ratio exists, not on the pivot flag itself
+    buy = (buy & ready).T.tolist()
+    sell = (sell & ready).T.tolist()
+
+    buy_reasons = _reasons(buy, BestFourPoint.BEST_BUY_WHY)
+    sell_reasons = _reasons(sell, BestFourPoint.BEST_SELL_WHY)
+    dates = dates or [None] * len(matrix)
+    prices = [None if p != p else p for p in price[:, -1].tolist()]
+    return [
+        Signal(*row)
+        for row in zip(
+            matrix.sids,
+            dates,
+            prices,
+            map(tuple, buy),
+            map(tuple, sell),
+            buy_pivots.tolist(),
+            sell_pivots.tolist(),
+            buy_reasons,
+            sell_reasons,
+        )
+    ]
+
+
+def screen_histories(histories):
+    """Return a Signal per {sid: StockData}, e.g. of market.build_histories"""
+    histories = {
+        sid: data if isinstance(data, StockData) else StockData(data)
+        for sid, data in histories.items()
+    }
+    dates = [data[-1].date if data else None for data in histories.values()]
+    return screen_matrix(StockMatrix.from_histories(histories), dates)
+
+
+def screen(stocks):
+    """Return a Signal per Stock, in the same order"""
+    return screen_histories({stock.sid: stock.data for stock in stocks})
+
+
+def _fresh_copies(stocks):
+    # Copies without the column views and indicators memoized in the data
+    copies = []
+    for stock in stocks:
+        stock = copy.copy(stock)
+        stock.data = stock.data[:]
+        copies.append(stock)
+    return copies
+
+
+def benchmark(stocks):
+    """Time screen against a BestFourPoint loop, return (screen seconds,
+    loop seconds)
+
+    Each runs on fresh copies of stocks, so neither reuses the column views
+    or indicators computed by the other.
+    """
+    copies = _fresh_copies(stocks)
+    start = time.perf_counter()
+    for stock in copies:
+        BestFourPoint(stock).best_four_point()
+    loop = time.perf_counter() - start
+
+    copies = _fresh_copies(stocks)
+    start = time.perf_counter()
+    screen(copies)
+    return time.perf_counter() - start, loop
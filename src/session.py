@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+#
+# Usage: Shared keep-alive HTTP sessions for the historical fetchers
+#
+# A requests.Session is not safe to share between threads, but the urllib3
+# connection pool behind an HTTPAdapter is. Every thread therefore gets its
+# own session, and all sessions mount the same adapter so that TCP/TLS
+# connections are reused across threads and Stock instances.
+#
+
+import json
+import threading
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from proxy import get_proxies
+from throttle import RATE_LIMIT_STATUS_CODES, get_rate_limiter, is_block_page
+
+# Upper bound of in-flight requests to one host, shared by every fetcher
+MAX_CONNECTIONS_PER_HOST = 4
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = MAX_CONNECTIONS_PER_HOST
+DEFAULT_HEADERS = {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+
+
+class SessionPool(object):
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pool_block: bool = True,
+        response_hooks: list = None,
+    ):
+        """pool_connections is the number of hosts kept alive, pool_maxsize
+        the number of connections kept per host. With pool_block a thread
+        waits for a free connection instead of opening an extra one.
+        response_hooks are requests response hooks, e.g. replay.Recorder."""
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self._local = threading.local()
+        self.response_hooks = response_hooks or []
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            session.hooks["response"].extend(self.response_hooks)
+            self._local.session = session
+        return session
+
+    def get(self, url, **kwargs):
+        get_rate_limiter().acquire(url)
+        return self.session.get(url, **kwargs)
+
+    def close(self):
+        self._adapter.close()
+
+
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+
+def host_semaphore(url):
+    """Return the semaphore limiting concurrent requests to url's host"""
+    host = urllib.parse.urlparse(url).netloc
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(
+                MAX_CONNECTIONS_PER_HOST
+            )
+        return _host_semaphores[host]
+
+
+def decode_payload(url, status, content_type, body):
+    """Return the JSON payload of a response of url, None to retry
+
+    Shared by the sync and async fetchers, it is the only place reporting
+    their throttling to the rate limiter, once per response. Other errors,
+    e.g. 404 or 500, are retried without backing off.
+    """
+    limiter = get_rate_limiter()
+    if status in RATE_LIMIT_STATUS_CODES:
+        limiter.throttled(url)
+        return None
+    try:
+        data = json.loads(body)
+    except ValueError:
+        if is_block_page(status, content_type):
+            limiter.throttled(url)
+        return None
+    if status != 200:
+        return None
+    limiter.succeeded(url)
+    return data
+
+
+def fetch_json(url, params=None, retry: int = 5):
+    """GET url until it answers with a JSON payload, None when every retry
+    failed"""
+    for retry_i in range(retry):
+        with host_semaphore(url):
+            r = get_session_pool().get(url, params=params, proxies=get_proxies())
+        data = decode_payload(
+            url, r.status_code, r.headers.get("Content-Type", ""), r.content
+        )
+        if data is not None:
+            return data
+    return None
+
+
+_pool_instance = SessionPool()
+
+
+def reset_session_pool():
+    configure_session_pool(SessionPool())
+
+
+def configure_session_pool(pool_instance):
+    global _pool_instance
+    if not isinstance(pool_instance, SessionPool):
+        raise BaseException("session pool should be a SessionPool object")
+    _pool_instance.close()
+    _pool_instance = pool_instance
+
+
+def get_session_pool():
+    return _pool_instance
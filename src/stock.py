@@ -1,18 +1,27 @@
 # -*- coding: utf-8 -*-
 
+import array
+import asyncio
+import bisect
 import datetime
+import itertools
+import operator
+import sys
 import urllib.parse
 from collections import namedtuple
+from collections.abc import MutableSequence, Sequence
+from concurrent.futures import ThreadPoolExecutor
 
+from async_session import fetch_json as async_fetch_json
+from cache import get_month_cache
 from proxy import get_proxies
+from session import fetch_json
 
 try:
     from json.decoder import JSONDecodeError
 except ImportError:
     JSONDecodeError = ValueError
 
-import requests
-
 try:
     import analytics
     from csv_reader import *
@@ -41,11 +50,426 @@ DATATUPLE = namedtuple(
     ],
 )
 
+# Storage type of each DATATUPLE field, see StockData
+_FIELD_TYPECODES = {
+    "date": "q",
+    "capacity": "q",
+    "turnover": "q",
+    "open": "d",
+    "high": "d",
+    "low": "d",
+    "close": "d",
+    "change": "d",
+    "transaction": "q",
+}
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+_INT_NONE = -(2**63)
+_FLOAT_NONE = float("nan")
+
+
+def _encode_date(value):
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _encode_int(value):
+    return _INT_NONE if value is None else value
+
+
+def _encode_float(value):
+    return _FLOAT_NONE if value is None else value
+
+
+def _decode_dates(values):
+    return [_EPOCH + datetime.timedelta(microseconds=v) for v in values]
+
+
+def _decode_ints(values):
+    values = values.tolist()
+    if _INT_NONE in values:
+        return [None if v == _INT_NONE else v for v in values]
+    return values
+
+
+def _decode_floats(values):
+    values = values.tolist()
+    if any(v != v for v in values):
+        return [None if v != v else v for v in values]
+    return values
+
+
+_ENCODERS = {"date": _encode_date}
+_DECODERS = {"date": _decode_dates}
+for _name, _typecode in _FIELD_TYPECODES.items():
+    _ENCODERS.setdefault(_name, _encode_int if _typecode == "q" else _encode_float)
+    _DECODERS.setdefault(_name, _decode_ints if _typecode == "q" else _decode_floats)
+
+
+# ROC date string ('106/05/02') to encoded date, shared by every fetcher
+_ROC_DATES = {}
+
+
+def _roc_date(date):
+    value = _ROC_DATES.get(date)
+    if value is None:
+        year, month, day = date.replace("＊", "").split("/")
+        value = _encode_date(datetime.datetime(int(year) + 1911, int(month), int(day)))
+        _ROC_DATES[date] = value
+    return value
+
+
+class ColumnView(list):
+    """Read-only list of one StockData column, shared until the data changes
+
+    Indicators computed from a view are memoized in its StockData, which
+    drops them on every change. Memoized lists are read-only views as well.
+    """
+
+    name = None
+    indicators = None
+    prefix_sums = None
+
+    def memo(self, indicator, params, compute):
+        """Return compute(), cached under (indicator, name, params)"""
+        if self.indicators is None:
+            return compute()
+        key = (indicator, self.name, params)
+        result = self.indicators.get(key)
+        if result is None:
+            result = compute()
+            if isinstance(result, list):
+                result = ColumnView(result)
+                result.name = key
+                result.indicators = self.indicators
+            self.indicators[key] = result
+        return result
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("column view is read-only, copy it with list() first")
+
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+class PrefixSums(object):
+    """Cumulative sums of a numeric StockData column
 
-class BaseFetcher(object):
-    def fetch(self, year, month, sid, retry):
+    The sum of any window is the difference of two cumulative sums, so any
+    window sum, mean or moving average costs O(1) per value. The sums are
+    extended on append, a change only drops the sums after it, and they are
+    brought up to date on the next query.
+    """
+
+    def __init__(self, values):
+        self._values = values
+        self._integer = values.typecode == "q"
+        self._sums = array.array(values.typecode, [0])
+        # Cumulative count of missing values, which are summed as 0
+        self._missing = array.array("q", [0])
+
+    def __len__(self):
+        return len(self._values)
+
+    def truncate(self, length):
+        """Forget the sums from row length on"""
+        del self._sums[length + 1 :]
+        del self._missing[length + 1 :]
+
+    def _sync(self):
+        new = self._values[len(self._sums) - 1 :]
+        if not new:
+            return
+        if self._integer:
+            missing = [v == _INT_NONE for v in new]
+        else:
+            missing = [v != v for v in new]
+        if any(missing):
+            new = [0 if m else v for v, m in zip(new, missing)]
+        self._missing.extend(
+            itertools.accumulate(missing[1:], initial=self._missing[-1] + missing[0])
+        )
+        self._sums.extend(
+            itertools.accumulate(new[1:], initial=self._sums[-1] + new[0])
+        )
+
+    def _window(self, start, stop):
+        self._sync()
+        start, stop, _ = slice(start, stop).indices(len(self._values))
+        stop = max(start, stop)
+        if self._missing[stop] != self._missing[start]:
+            raise ValueError("window has missing values")
+        return start, stop
+
+    def sum(self, start=0, stop=None):
+        """Return the sum of rows start to stop, indexed like a slice"""
+        start, stop = self._window(start, stop)
+        return self._sums[stop] - self._sums[start]
+
+    def mean(self, start=0, stop=None):
+        """Return the mean of rows start to stop, indexed like a slice"""
+        start, stop = self._window(start, stop)
+        if start == stop:
+            raise ValueError("window is empty")
+        return (self._sums[stop] - self._sums[start]) / (stop - start)
+
+    def moving_average(self, days):
+        """Return Analytics.moving_average of the column, rounded exactly the
+        same way, or None when the column has missing values"""
+        self._sync()
+        sums, values = self._sums, self._values
+        if self._missing[-1]:
+            return None
+        if self._integer:
+            # Integer sums are exact, so is their division
+            return [
+                round((sums[i + days] - sums[i]) / days, 2)
+                for i in range(len(values) - days + 1)
+            ]
+        if len(values) < days:
+            return []
+
+        def exact(i):
+            return round(sum(values[i : i + days]) / days, 2)
+
+        # Bound the error of the sums, added one by one
+        error = 4 * sys.float_info.epsilon * len(values) * sum(map(abs, values))
+        if analytics.numpy is not None and len(values) >= analytics.NUMPY_MIN_LENGTH:
+            cumsum = analytics.numpy.array(sums, dtype=float)
+            return analytics._window_means(cumsum, days, error, exact)
+
+        totals = list(map(operator.sub, sums[days:], sums[:-days]))
+        result = [round(total / days, 2) for total in totals]
+        # Near ties, or when the sign of a zero depends on the summation
+        # order, the window is summed again
+        scale = 100 / days
+        tolerance = error * scale
+        relative = analytics.ROUNDING_TOLERANCE
+        for i, scaled in enumerate([total * scale for total in totals]):
+            if abs(scaled) < 1 or (
+                abs(scaled % 1 - 0.5) < relative * abs(scaled) + tolerance
+            ):
+                result[i] = exact(i)
+        return result
+
+
+class StockData(MutableSequence):
+    """Sequence of DATATUPLE rows kept as typed columns
+
+    Each field is stored in an ``array.array``, None is kept as NaN for
+    prices and as a sentinel for integers. Rows are rebuilt on access, and
+    column views are built once and cached until the data is modified.
+    """
+
+    def __init__(self, rows=()):
+        self._columns = {
+            name: array.array(typecode) for name, typecode in _FIELD_TYPECODES.items()
+        }
+        self._views = {}
+        self._indicators = {}
+        self._prefix_sums = {}
+        self.version = 0
+        self.extend(rows)
+
+    @classmethod
+    def _from_columns(cls, columns):
+        data = cls()
+        data._columns = columns
+        return data
+
+    def _changed(self, start=0):
+        # start is the first changed row, prefix sums before it are kept
+        self.version += 1
+        # Views kept by callers hold the old rows, the sums follow the new
+        for view in self._views.values():
+            view.prefix_sums = None
+        self._views = {}
+        self._indicators = {}
+        for prefix_sums in self._prefix_sums.values():
+            prefix_sums.truncate(start)
+
+    def _start(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            # An empty slice, as in data[i:i] = rows, inserts at its start
+            return min(range(start, stop, step), default=max(min(start, stop), 0))
+        if index < 0:
+            index += len(self)
+        return min(max(index, 0), len(self))
+
+    def column(self, name):
+        """Return a read-only list of field name"""
+        view = self._views.get(name)
+        if view is None:
+            view = ColumnView(_DECODERS[name](self._columns[name]))
+            view.name = name
+            view.indicators = self._indicators
+            view.prefix_sums = self._prefix_sums.get(name)
+            self._views[name] = view
+        return view
+
+    def prefix_sums(self, name):
+        """Return the PrefixSums of numeric field name
+
+        From then on the sums are maintained along the data, and moving
+        averages of the column are computed from them.
+        """
+        if name not in _FIELD_TYPECODES or name == "date":
+            raise ValueError("%s is not a numeric field" % name)
+        prefix_sums = self._prefix_sums.get(name)
+        if prefix_sums is None:
+            prefix_sums = PrefixSums(self._columns[name])
+            self._prefix_sums[name] = prefix_sums
+            self._views.pop(name, None)
+        return prefix_sums
+
+    def __len__(self):
+        return len(self._columns["date"])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._from_columns(
+                {name: column[index] for name, column in self._columns.items()}
+            )
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("StockData index out of range")
+        # A row alone is decoded without building its column views
+        return DATATUPLE(
+            *(
+                (
+                    self._views[name][index]
+                    if name in self._views
+                    else _DECODERS[name](self._columns[name][index : index + 1])[0]
+                )
+                for name in DATATUPLE._fields
+            )
+        )
+
+    def __iter__(self):
+        return map(DATATUPLE._make, zip(*(self.column(n) for n in DATATUPLE._fields)))
+
+    def __setitem__(self, index, row):
+        start = self._start(index)
+        if isinstance(index, slice):
+            rows = StockData(row)
+            for name, column in self._columns.items():
+                column[index] = rows._columns[name]
+        else:
+            for name, value in zip(DATATUPLE._fields, row):
+                self._columns[name][index] = _ENCODERS[name](value)
+        self._changed(start)
+
+    def __delitem__(self, index):
+        start = self._start(index)
+        for column in self._columns.values():
+            del column[index]
+        self._changed(start)
+
+    def insert(self, index, row):
+        start = self._start(index)
+        for name, value in zip(DATATUPLE._fields, row):
+            self._columns[name].insert(index, _ENCODERS[name](value))
+        self._changed(start)
+
+    def append(self, row):
+        start = len(self)
+        for name, value in zip(DATATUPLE._fields, row):
+            self._columns[name].append(_ENCODERS[name](value))
+        self._changed(start)
+
+    def extend(self, rows):
+        start = len(self)
+        if isinstance(rows, StockData):
+            for name, column in self._columns.items():
+                column.extend(rows._columns[name])
+        else:
+            rows = list(rows)
+            if not rows:
+                return
+            for name, values in zip(DATATUPLE._fields, zip(*rows)):
+                self._columns[name].extend(map(_ENCODERS[name], values))
+        self._changed(start)
+
+    def __add__(self, rows):
+        data = self[:]
+        data.extend(rows)
+        return data
+
+    def __radd__(self, rows):
+        data = StockData(rows)
+        data.extend(self)
+        return data
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class ReportURLMixin(object):
+    REPORT_URL = ""
+    # Host the requests go to instead of REPORT_URL's, e.g. a replay server
+    # set by replay.redirect_fetchers
+    redirect_url = None
+
+    @property
+    def report_url(self):
+        if self.redirect_url is None:
+            return self.REPORT_URL
+        path = urllib.parse.urlsplit(self.REPORT_URL).path
+        return urllib.parse.urljoin(self.redirect_url, path)
+
+
+class BaseFetcher(ReportURLMixin):
+    MARKET = ""
+
+    def fetch(self, year: int, month: int, sid: str, retry: int = 5):
+        cached = self._load_cache(year, month, sid)
+        if cached is not None:
+            return cached
+
+        params = self._make_params(year, month, sid)
+        data = fetch_json(self.report_url, params, retry)
+        if data is None:
+            # Fail in all retries
+            data = self._empty_data()
+        return self._process(year, month, sid, data)
+
+    def _make_params(self, year, month, sid):
+        pass
+
+    def _empty_data(self):
+        pass
+
+    def _process(self, year, month, sid, data):
+        """Purify fetched data and store it into the month cache"""
         pass
 
+    def _load_cache(self, year, month, sid):
+        """Return cached month data, or None when it should be fetched
+
+        The cache keeps purified rows only, so a hit is normalized to
+        {"stat": "OK", "data": StockData} for both markets, without the raw
+        report fields such as TPEX's aaData.
+        """
+        rows = get_month_cache().get(self.MARKET, sid, year, month)
+        if rows is None:
+            return None
+        return {"stat": "OK", "data": StockData(rows)}
+
+    def _save_cache(self, year, month, sid, data):
+        if data:
+            get_month_cache().set(self.MARKET, sid, year, month, data)
+
     def _convert_date(self, date):
         """Convert '106/05/01' to '2017/05/01'"""
         return "/".join([str(int(date.split("/")[0]) + 1911)] + date.split("/")[1:])
@@ -56,29 +480,60 @@ class BaseFetcher(object):
     def purify(self, original_data):
         pass
 
+    def _purify_columns(self, rows, scale=None):
+        """Parse a whole month of rows into StockData at once
+
+        Every numeric field is joined into one string, so thousands
+        separators and '--' are handled by a single replace before the
+        values are converted with map(). scale multiplies integer fields,
+        e.g. TPEX reports capacity in thousand shares. Unexpected layouts
+        fall back to _make_datatuple row by row.
+        """
+        scale = scale or {}
+        fields = list(zip(*rows))
+        if len(fields) != len(DATATUPLE._fields):
+            return StockData(self._make_datatuple(list(row)) for row in rows)
+
+        try:
+            columns = {"date": array.array("q", map(_roc_date, fields[0]))}
+            for name, values in zip(DATATUPLE._fields[1:], fields[1:]):
+                text = " ".join(values).replace(",", "")
+                if _FIELD_TYPECODES[name] == "d":
+                    # +/-/X表示漲/跌/不比價
+                    text = text.replace("--", "nan").replace("X0.00", "0.00")
+                    values = text.split()
+                    column = array.array("d", map(float, values))
+                elif name in scale:
+                    values = text.split()
+                    column = array.array("q", [int(v) * scale[name] for v in values])
+                else:
+                    values = text.split()
+                    column = array.array("q", map(int, values))
+                if len(values) != len(rows):
+                    raise ValueError("unexpected %s field" % name)
+                columns[name] = column
+        except ValueError:
+            return StockData(self._make_datatuple(list(row)) for row in rows)
+        return StockData._from_columns(columns)
+
 
 class TWSEFetcher(BaseFetcher):
+    MARKET = "twse"
     REPORT_URL = urllib.parse.urljoin(TWSE_BASE_URL, "exchangeReport/STOCK_DAY")
 
     def __init__(self):
         pass
 
-    def fetch(self, year: int, month: int, sid: str, retry: int = 5):
-        params = {"date": "%d%02d01" % (year, month), "stockNo": sid}
-        for retry_i in range(retry):
-            r = requests.get(self.REPORT_URL, params=params, proxies=get_proxies())
-            try:
-                data = r.json()
-            except JSONDecodeError:
-                continue
-            else:
-                break
-        else:
-            # Fail in all retries
-            data = {"stat": "", "data": []}
+    def _make_params(self, year, month, sid):
+        return {"date": "%d%02d01" % (year, month), "stockNo": sid}
+
+    def _empty_data(self):
+        return {"stat": "", "data": []}
 
+    def _process(self, year, month, sid, data):
         if data["stat"] == "OK":
             data["data"] = self.purify(data)
+            self._save_cache(year, month, sid, data["data"])
         else:
             data["data"] = []
         return data
@@ -99,10 +554,11 @@ class TWSEFetcher(BaseFetcher):
         return DATATUPLE(*data)
 
     def purify(self, original_data):
-        return [self._make_datatuple(d) for d in original_data["data"]]
+        return self._purify_columns(original_data["data"])
 
 
 class TPEXFetcher(BaseFetcher):
+    MARKET = "tpex"
     REPORT_URL = urllib.parse.urljoin(
         TPEX_BASE_URL, "web/stock/aftertrading/daily_trading_info/st43_result.php"
     )
@@ -110,23 +566,17 @@ class TPEXFetcher(BaseFetcher):
     def __init__(self):
         pass
 
-    def fetch(self, year: int, month: int, sid: str, retry: int = 5):
-        params = {"d": "%d/%d" % (year - 1911, month), "stkno": sid}
-        for retry_i in range(retry):
-            r = requests.get(self.REPORT_URL, params=params, proxies=get_proxies())
-            try:
-                data = r.json()
-            except JSONDecodeError:
-                continue
-            else:
-                break
-        else:
-            # Fail in all retries
-            data = {"aaData": []}
+    def _make_params(self, year, month, sid):
+        return {"d": "%d/%d" % (year - 1911, month), "stkno": sid}
+
+    def _empty_data(self):
+        return {"aaData": []}
 
+    def _process(self, year, month, sid, data):
         data["data"] = []
         if data["aaData"]:
             data["data"] = self.purify(data)
+            self._save_cache(year, month, sid, data["data"])
         return data
 
     def _convert_date(self, date):
@@ -148,15 +598,47 @@ class TPEXFetcher(BaseFetcher):
         return DATATUPLE(*data)
 
     def purify(self, original_data):
-        return [self._make_datatuple(d) for d in original_data["aaData"]]
+        return self._purify_columns(
+            original_data["aaData"], scale={"capacity": 1000, "turnover": 1000}
+        )
+
+
+class AsyncFetcherMixin(object):
+    """Coroutine fetch on top of a TWSE/TPEX fetcher"""
+
+    async def fetch(self, year: int, month: int, sid: str, retry: int = 5):
+        cached = self._load_cache(year, month, sid)
+        if cached is not None:
+            return cached
+
+        params = self._make_params(year, month, sid)
+        data = await async_fetch_json(self.report_url, params, retry)
+        if data is None:
+            data = self._empty_data()
+        return self._process(year, month, sid, data)
+
+
+class AsyncTWSEFetcher(AsyncFetcherMixin, TWSEFetcher):
+    pass
+
+
+class AsyncTPEXFetcher(AsyncFetcherMixin, TPEXFetcher):
+    pass
 
 
 class Stock(analytics.Analytics):
-    def __init__(self, sid: str, initial_fetch: bool = True):
+    def __init__(self, sid: str, initial_fetch: bool = True, prefix_sums: bool = False):
+        """With prefix_sums the numeric columns keep a PrefixSums index"""
         self.sid = sid
-        self.fetcher = TWSEFetcher() if codes[sid].market == "上市" else TPEXFetcher()
+        self.prefix_sums = prefix_sums
+        if codes[sid].market == "上市":
+            self.fetcher = TWSEFetcher()
+            self.async_fetcher = AsyncTWSEFetcher()
+        else:
+            self.fetcher = TPEXFetcher()
+            self.async_fetcher = AsyncTPEXFetcher()
         self.raw_data = []
-        self.data = []
+        self.data = StockData()
 
         # Init data
         if initial_fetch:
@@ -175,14 +657,28 @@ class Stock(analytics.Analytics):
         self.data = self.raw_data[0]["data"]
         return self.data
 
-    def fetch_from(self, year: int, month: int):
-        """Fetch data from year, month to current year month data"""
+    def fetch_from(self, year: int, month: int, workers: int = 1):
+        """Fetch data from year, month to current year month data
+
+        With workers > 1 the months are fetched concurrently, the result is
+        still in chronological order.
+        """
         self.raw_data = []
         self.data = []
         today = datetime.datetime.today()
-        for year, month in self._month_year_iter(month, year, today.month, today.year):
-            self.raw_data.append(self.fetcher.fetch(year, month, self.sid))
-            self.data.extend(self.raw_data[-1]["data"])
+        months = self._month_year_iter(month, year, today.month, today.year)
+
+        def fetch_month(year_month):
+            return self.fetcher.fetch(year_month[0], year_month[1], self.sid)
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                self.raw_data = list(executor.map(fetch_month, months))
+        else:
+            self.raw_data = [fetch_month(year_month) for year_month in months]
+
+        for raw_data in self.raw_data:
+            self.data.extend(raw_data["data"])
         return self.data
 
     def fetch_31(self):
@@ -193,45 +689,116 @@ class Stock(analytics.Analytics):
         self.data = self.data[-31:]
         return self.data
 
+    def refresh(self, window: int = None):
+        """Fetch only the months since the last held date and merge them
+
+        Held rows from the first fetched date on are replaced, so today's
+        row is updated while the market is open. window keeps only the
+        latest window rows, None keeps everything.
+        """
+        if not len(self.data):
+            self.fetch_31()
+        else:
+            last = self.data[-1].date
+            today = datetime.datetime.today()
+            months = self._month_year_iter(
+                last.month, last.year, today.month, today.year
+            )
+            self.raw_data = [self.fetcher.fetch(y, m, self.sid) for y, m in months]
+
+            rows = [
+                row
+                for raw_data in self.raw_data
+                for row in raw_data["data"]
+                if row.date >= last
+            ]
+            if rows:
+                del self.data[bisect.bisect_left(self.date, rows[0].date) :]
+                self.data.extend(rows)
+
+        if window is not None:
+            del self.data[:-window]
+        return self.data
+
+    async def afetch(self, year: int, month: int):
+        """Coroutine version of fetch"""
+        self.raw_data = [await self.async_fetcher.fetch(year, month, self.sid)]
+        self.data = self.raw_data[0]["data"]
+        return self.data
+
+    async def afetch_from(self, year: int, month: int):
+        """Coroutine version of fetch_from, all months are fetched concurrently"""
+        today = datetime.datetime.today()
+        months = self._month_year_iter(month, year, today.month, today.year)
+        self.raw_data = list(
+            await asyncio.gather(
+                *(self.async_fetcher.fetch(y, m, self.sid) for y, m in months)
+            )
+        )
+        self.data = []
+        for raw_data in self.raw_data:
+            self.data.extend(raw_data["data"])
+        return self.data
+
+    async def afetch_31(self):
+        """Coroutine version of fetch_31"""
+        today = datetime.datetime.today()
+        before = today - datetime.timedelta(days=60)
+        await self.afetch_from(before.year, before.month)
+        self.data = self.data[-31:]
+        return self.data
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, rows):
+        self._data = rows if isinstance(rows, StockData) else StockData(rows)
+        if self.prefix_sums:
+            for name in DATATUPLE._fields[1:]:
+                self._data.prefix_sums(name)
+
     @property
     def date(self):
-        return [d.date for d in self.data]
+        return self._data.column("date")
 
     @property
     def capacity(self):
-        return [d.capacity for d in self.data]
+        return self._data.column("capacity")
 
     @property
     def turnover(self):
-        return [d.turnover for d in self.data]
+        return self._data.column("turnover")
 
     @property
     def price(self):
-        return [d.close for d in self.data]
+        return self._data.column("close")
 
     @property
     def high(self):
-        return [d.high for d in self.data]
+        return self._data.column("high")
 
     @property
     def low(self):
-        return [d.low for d in self.data]
+        return self._data.column("low")
 
     @property
     def open(self):
-        return [d.open for d in self.data]
+        return self._data.column("open")
 
     @property
     def close(self):
-        return [d.close for d in self.data]
+        return self._data.column("close")
 
     @property
     def change(self):
-        return [d.change for d in self.data]
+        return self._data.column("change")
 
     @property
     def transaction(self):
-        return [d.transaction for d in self.data]
+        return self._data.column("transaction")
+
 
 def run(argv):
     for sid in argv:
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+#
+# Usage: Indicators updated in O(1) per bar for real-time signal loops
+#
+# Each indicator is seeded with the history once, then follows the market
+# with append() for a new bar and replace_last() when a newer tick of the
+# current bar arrives. Values are identical to analytics.Analytics on the
+# whole history.
+#
+#   >>> bfp = StreamingBestFourPoint(stock.data)
+#   >>> bfp.replace_last(new_bar)
+#   >>> bfp.best_four_point_to_buy()
+#
+
+import collections
+import math
+
+from analytics import BestFourPoint, _near_tie
+
+
+class MovingAverage(object):
+    def __init__(self, days: int, values=()):
+        """Moving average of the last days values, see Analytics.moving_average"""
+        if days < 1:
+            raise ValueError("days should be a positive integer")
+        self.days = days
+        self._window = collections.deque(maxlen=days)
+        self._total = 0
+        self._appended = 0
+        self.value = None
+        self.extend(values)
+
+    def _resync(self):
+        self._total = sum(self._window)
+        self._appended = 0
+
+    def _update(self):
+        if len(self._window) < self.days:
+            self.value = None
+            return
+        if self._appended >= self.days or not math.isfinite(self._total):
+            # Bound the drift of the running total
+            self._resync()
+        scaled = self._total * 100 / self.days
+        if math.isfinite(scaled) and _near_tie(scaled):
+            self.value = round(sum(self._window) / self.days, 2)
+        else:
+            self.value = round(self._total / self.days, 2)
+
+    def append(self, value):
+        if len(self._window) == self.days:
+            self._total -= self._window[0]
+        self._window.append(value)
+        self._total += value
+        self._appended += 1
+        self._update()
+        return self.value
+
+    def replace_last(self, value):
+        self._total += value - self._window[-1]
+        self._window[-1] = value
+        self._appended += 1
+        self._update()
+        return self.value
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+        return self.value
+
+
+class BiasRatio(object):
+    def __init__(self, day1: int, day2: int, values=()):
+        """Moving average bias ratio, see Analytics.ma_bias_ratio"""
+        self._average1 = MovingAverage(day1)
+        self._average2 = MovingAverage(day2)
+        self.value = None
+        self.extend(values)
+
+    def _update(self):
+        if self._average1.value is None or self._average2.value is None:
+            self.value = None
+        else:
+            self.value = self._average1.value - self._average2.value
+        return self.value
+
+    def append(self, value):
+        self._average1.append(value)
+        self._average2.append(value)
+        return self._update()
+
+    def replace_last(self, value):
+        self._average1.replace_last(value)
+        self._average2.replace_last(value)
+        return self._update()
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+        return self.value
+
+
+class Continuous(object):
+    def __init__(self, values=()):
+        """Signed length of the last run, see Analytics.continuous"""
+        self._last = None
+        self._previous = None
+        self._run = (0, 0)
+        self._run_before = (0, 0)
+        self.value = 0
+        self.extend(values)
+
+    def _update(self):
+        direction, count = self._run_before
+        if self._previous is not None:
+            step = 1 if self._last > self._previous else -1
+            count = count + 1 if step == direction else 1
+            direction = step
+        self._run = (direction, count)
+        self.value = direction * count
+        return self.value
+
+    def append(self, value):
+        self._previous, self._last = self._last, value
+        self._run_before = self._run
+        return self._update()
+
+    def replace_last(self, value):
+        self._last = value
+        return self._update()
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+        return self.value
+
+
+class Pivot(object):
+    def __init__(self, sample_size: int = 5, position: bool = False, values=()):
+        """Pivot of the last sample_size values, see
+        Analytics.ma_bias_ratio_pivot"""
+        self.sample_size = sample_size
+        self.position = position
+        self._sample = collections.deque(maxlen=sample_size)
+        self.extend(values)
+
+    @property
+    def value(self):
+        sample = list(self._sample)
+        if not sample:
+            return None
+        if self.position is True:
+            check_value = max(sample)
+            pre_check_value = max(sample) > 0
+        else:
+            check_value = min(sample)
+            pre_check_value = max(sample) < 0
+        index = sample.index(check_value)
+        return (
+            self.sample_size - index < 4
+            and index != self.sample_size - 1
+            and pre_check_value,
+            self.sample_size - index - 1,
+            check_value,
+        )
+
+    def append(self, value):
+        self._sample.append(value)
+        return self.value
+
+    def replace_last(self, value):
+        self._sample[-1] = value
+        return self.value
+
+    def extend(self, values):
+        self._sample.extend(values)
+        return self.value
+
+
+class StreamingBestFourPoint(BestFourPoint):
+    def __init__(self, rows=(), short: int = 3, long: int = 6, sample_size: int = 5):
+        """BestFourPoint over bars fed with append and replace_last"""
+        super().__init__(None, short, long, sample_size)
+        self._bars = collections.deque(maxlen=2)
+        self._short_average = MovingAverage(short)
+        self._long_average = MovingAverage(long)
+        self._continuous = Continuous()
+        self._plus_pivot = Pivot(sample_size, True)
+        self._mins_pivot = Pivot(sample_size, False)
+        for row in rows:
+            self.append(row)
+
+    def _update(self, method):
+        # method is "append" for a new bar and "replace_last" for a new tick
+        short = getattr(self._short_average, method)(self._bars[-1].close)
+        long = getattr(self._long_average, method)(self._bars[-1].close)
+        if short is not None:
+            getattr(self._continuous, method)(short)
+        if short is not None and long is not None:
+            getattr(self._plus_pivot, method)(short - long)
+            getattr(self._mins_pivot, method)(short - long)
+
+    def append(self, row):
+        """Add the bar of a new day"""
+        self._bars.append(row)
+        self._update("append")
+
+    def replace_last(self, row):
+        """Update the bar of the current day with a newer tick"""
+        self._bars[-1] = row
+        self._update("replace_last")
+
+    def bias_ratio(self, position=False):
+        return (self._plus_pivot if position else self._mins_pivot).value
+
+    def best_buy_1(self):
+        return (
+            self._bars[-1].capacity > self._bars[-2].capacity
+            and self._bars[-1].close > self._bars[-1].open
+        )
+
+    def best_buy_2(self):
+        return (
+            self._bars[-1].capacity < self._bars[-2].capacity
+            and self._bars[-1].close > self._bars[-2].open
+        )
+
+    def best_buy_3(self):
+        return self._continuous.value == 1
+
+    def best_buy_4(self):
+        return self._short_average.value > self._long_average.value
+
+    def best_sell_1(self):
+        return (
+            self._bars[-1].capacity > self._bars[-2].capacity
+            and self._bars[-1].close < self._bars[-1].open
+        )
+
+    def best_sell_2(self):
+        return (
+            self._bars[-1].capacity < self._bars[-2].capacity
+            and self._bars[-1].close < self._bars[-2].open
+        )
+
+    def best_sell_3(self):
+        return self._continuous.value == -1
+
+    def best_sell_4(self):
+        return self._short_average.value < self._long_average.value
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+# Usage: Backtest BestFourPoint for many window combinations at once
+#
+#   >>> results = sweep(stocks, grid(short=(2, 3, 5), long=(6, 10, 20)), workers=4)
+#   >>> max(results, key=lambda r: r.summary[0].mean_return)
+#
+# The universe is turned into a StockMatrix once. Every worker process
+# receives its columns once, through the pool initializer, and keeps the
+# moving averages it computed for the combinations it runs next.
+#
+
+import itertools
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from backtest import Backtest
+from matrix import StockMatrix
+
+SweepResult = namedtuple("SweepResult", ["short", "long", "sample_size", "summary"])
+
+# Matrix of the current worker process, see _init_worker
+_matrix = None
+
+
+class CachedMatrix(StockMatrix):
+    """StockMatrix memoizing the moving averages of its own columns"""
+
+    def __init__(self, sids, columns, dates=None):
+        super().__init__(sids, columns, dates)
+        self._averages = {}
+
+    def moving_average(self, data, days):
+        names = [name for name, column in self.columns.items() if column is data]
+        if not names:
+            return super().moving_average(data, days)
+        key = (names[0], days)
+        result = self._averages.get(key)
+        if result is None:
+            result = super().moving_average(data, days)
+            result.flags.writeable = False
+            self._averages[key] = result
+        return result
+
+
+def grid(short=(3,), long=(6,), sample_size=(5,)):
+    """Return every (short, long, sample_size) with short < long"""
+    return [
+        params
+        for params in itertools.product(short, long, sample_size)
+        if params[0] < params[1]
+    ]
+
+
+def _init_worker(sids, columns):
+    global _matrix
+    _matrix = CachedMatrix(sids, columns)
+
+
+def _run(params, horizons, use_pivot):
+    short, long, sample_size = params
+    result = Backtest(_matrix, short, long, sample_size, use_pivot)
+    return SweepResult(short, long, sample_size, result.summary(horizons))
+
+
+def sweep(universe, params, horizons=(1, 5, 20), use_pivot=False, workers: int = 1):
+    """Backtest every (short, long, sample_size) of params
+
+    universe is a tail aligned StockMatrix or a list of Stock. Return a
+    SweepResult per params, in the same order, whose summary is the
+    Backtest.summary of the horizons. With workers > 1 the combinations
+    are spread over a process pool.
+    """
+    global _matrix
+    if not isinstance(universe, StockMatrix):
+        universe = StockMatrix.from_stocks(universe)
+    params = [tuple(p) for p in params]
+    initargs = (universe.sids, universe.columns)
+    horizons = tuple(horizons)
+
+    if workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=initargs
+        ) as executor:
+            chunksize = max(1, len(params) // (workers * 4))
+            return list(
+                executor.map(
+                    _run,
+                    params,
+                    itertools.repeat(horizons),
+                    itertools.repeat(use_pivot),
+                    chunksize=chunksize,
+                )
+            )
+
+    previous = _matrix
+    _init_worker(*initargs)
+    try:
+        return [_run(p, horizons, use_pivot) for p in params]
+    finally:
+        _matrix = previous
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+#
+# Usage: Process-wide per-host rate limiting with adaptive backoff
+#
+# Every outbound request first takes a token from its host's bucket. When a
+# host starts throttling (HTTP 429/503 or an html block page instead of JSON),
+# the host is blocked for an exponentially growing, jittered delay and its
+# bucket is drained, so the next requests are spread out instead of bursting.
+#
+
+import asyncio
+import random
+import threading
+import time
+import urllib.parse
+
+DEFAULT_RATE = 2.0
+DEFAULT_BURST = 5
+DEFAULT_BASE_DELAY = 2.0
+DEFAULT_MAX_DELAY = 120.0
+THROTTLE_STATUS_CODES = (403, 429, 503)
+# Statuses that always mean throttling, and those of an html block page,
+# which TWSE sends with 200
+RATE_LIMIT_STATUS_CODES = (429, 503)
+BLOCK_PAGE_STATUS_CODES = (200, 403)
+
+
+class _HostState(object):
+    __slots__ = ("rate", "burst", "tokens", "updated", "blocked_until", "failures")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+        self.blocked_until = now
+        self.failures = 0
+
+
+class RateLimiter(object):
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        host_rates: dict = None,
+    ):
+        """rate is the sustained requests per second of one host and burst
+        the bucket size, host_rates overrides both as {host: (rate, burst)}.
+        A rate of None disables the bucket, backoff still applies."""
+        self.rate = rate
+        self.burst = burst
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.host_rates = host_rates or {}
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, url, now):
+        host = urllib.parse.urlparse(url).netloc
+        state = self._hosts.get(host)
+        if state is None:
+            rate, burst = self.host_rates.get(host, (self.rate, self.burst))
+            state = self._hosts[host] = _HostState(rate, burst, now)
+        return state
+
+    def reserve(self, url):
+        """Take a token for url's host, return the seconds to wait before use"""
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(url, now)
+            wait = max(0.0, state.blocked_until - now)
+            if state.rate is not None:
+                state.tokens = min(
+                    state.burst, state.tokens + (now - state.updated) * state.rate
+                )
+                state.updated = now
+                state.tokens -= 1
+                if state.tokens < 0:
+                    wait = max(wait, -state.tokens / state.rate)
+            return wait
+
+    def acquire(self, url):
+        time.sleep(self.reserve(url))
+
+    async def async_acquire(self, url):
+        await asyncio.sleep(self.reserve(url))
+
+    def throttled(self, url):
+        """Report that url's host refused a request, return the backoff delay"""
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(url, now)
+            state.failures += 1
+            delay = min(self.max_delay, self.base_delay * 2 ** (state.failures - 1))
+            delay = random.uniform(delay / 2, delay)
+            state.blocked_until = max(state.blocked_until, now + delay)
+            state.tokens = min(state.tokens, 0)
+            return delay
+
+    def succeeded(self, url):
+        with self._lock:
+            self._state(url, time.monotonic()).failures = 0
+
+
+def is_block_page(status, content_type):
+    """Tell whether a response that is not JSON is a throttling block page"""
+    return status in BLOCK_PAGE_STATUS_CODES and "html" in (content_type or "")
+
+
+_limiter_instance = RateLimiter()
+
+
+def reset_rate_limiter():
+    configure_rate_limiter(RateLimiter())
+
+
+def configure_rate_limiter(limiter_instance):
+    global _limiter_instance
+    if not isinstance(limiter_instance, RateLimiter):
+        raise BaseException("rate limiter should be a RateLimiter object")
+    _limiter_instance = limiter_instance
+
+
+def get_rate_limiter():
+    return _limiter_instance
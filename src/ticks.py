@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+#
+# Usage: Record realtime quotes into binary files and map them back
+#
+#   >>> with TickRecorder("ticks") as recorder:
+#   ...     for delta in realtime.stream(stocks):
+#   ...         recorder.record(delta)
+#
+#   >>> reader = TickReader("ticks", "20241011")
+#   >>> ticks = reader.ticks("2330", start=datetime(2024, 10, 11, 9, 30))
+#   >>> ticks["price"], ticks["bid_prices"][:, 0]
+#
+# Every symbol of a day is one append-only file, root/YYYYMMDD/CODE.ticks,
+# of fixed-width TICK_FIELDS records in tlong order. The recorder only needs
+# the standard library, the reader memory-maps the files and returns numpy
+# views of them, without copying. numpy is optional, it is only required by
+# TickReader.
+#
+
+import datetime
+import math
+import os
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from realtime import Quote
+
+BOOK_DEPTH = 5
+SUFFIX = ".ticks"
+# (name, struct code, count) of a record, little-endian without padding
+TICK_FIELDS = (
+    ("tlong", "q", 1),
+    ("price", "d", 1),
+    ("trade_volume", "q", 1),
+    ("volume", "q", 1),
+    ("open", "d", 1),
+    ("high", "d", 1),
+    ("low", "d", 1),
+    ("bid_prices", "d", BOOK_DEPTH),
+    ("bid_volumes", "q", BOOK_DEPTH),
+    ("ask_prices", "d", BOOK_DEPTH),
+    ("ask_volumes", "q", BOOK_DEPTH),
+)
+TICK_STRUCT = struct.Struct(
+    "<" + "".join("%d%s" % (count, code) for _, code, count in TICK_FIELDS)
+)
+
+
+def tick_dtype():
+    """Return the numpy dtype of a record"""
+    return numpy.dtype(
+        [
+            (name, "<" + {"q": "i8", "d": "f8"}[code], (count,) if count > 1 else ())
+            for name, code, count in TICK_FIELDS
+        ]
+    )
+
+
+def day_of(value) -> str:
+    """Return the YYYYMMDD directory name of a date, or of a day as is"""
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.strftime("%Y%m%d")
+    return str(value)
+
+
+def _book(values, fill):
+    values = values[:BOOK_DEPTH]
+    return values + (fill,) * (BOOK_DEPTH - len(values))
+
+
+def pack_quote(quote: Quote) -> bytes:
+    """Return the record of a Quote"""
+    return TICK_STRUCT.pack(
+        quote.tlong,
+        quote.price,
+        quote.trade_volume,
+        quote.volume,
+        quote.open,
+        quote.high,
+        quote.low,
+        *_book(quote.bid_prices, math.nan),
+        *_book(quote.bid_volumes, 0),
+        *_book(quote.ask_prices, math.nan),
+        *_book(quote.ask_volumes, 0),
+    )
+
+
+class TickRecorder(object):
+    def __init__(self, root: str):
+        """Append the quotes of realtime.stream to the day files under root
+
+        Quotes not newer than the last record of their file, by tlong, are
+        skipped, so the repeated quotes of successive polls are kept once.
+        """
+        self.root = root
+        self._files = {}
+        self._last = {}
+
+    def _open(self, path):
+        f = self._files.get(path)
+        if f is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            f = open(path, "ab")
+            # A record cut short by a crash is dropped, appends stay aligned
+            size = f.seek(0, os.SEEK_END)
+            f.truncate(size - size % TICK_STRUCT.size)
+            self._files[path] = f
+            self._last[path] = self._last_tlong(path)
+        return f
+
+    @staticmethod
+    def _last_tlong(path):
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size < TICK_STRUCT.size:
+                return None
+            f.seek(size - TICK_STRUCT.size)
+            return TICK_STRUCT.unpack(f.read(TICK_STRUCT.size))[0]
+
+    def path(self, code: str, day) -> str:
+        return os.path.join(self.root, day_of(day), code + SUFFIX)
+
+    def record(self, quotes) -> int:
+        """Append a Quote, or the Quotes of {code: quote}, return the count
+        of records written"""
+        if isinstance(quotes, Quote):
+            quotes = {quotes.code: quotes}
+        written, count = set(), 0
+        for quote in quotes.values():
+            if not isinstance(quote, Quote):
+                continue
+            path = self.path(quote.code, quote.datetime)
+            f = self._open(path)
+            last = self._last[path]
+            if last is not None and quote.tlong <= last:
+                continue
+            f.write(pack_quote(quote))
+            self._last[path] = quote.tlong
+            written.add(path)
+            count += 1
+        for path in written:
+            self._files[path].flush()
+        return count
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TickReader(object):
+    def __init__(self, root: str, day):
+        """Memory-map the records of a day written by TickRecorder
+
+        A file is mapped on its first access, records appended later are
+        seen by a new TickReader.
+        """
+        if numpy is None:
+            raise ImportError("TickReader requires numpy")
+        self.directory = os.path.join(root, day_of(day))
+        self.dtype = tick_dtype()
+        self._maps = {}
+
+    def symbols(self) -> list:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name[: -len(SUFFIX)]
+            for name in os.listdir(self.directory)
+            if name.endswith(SUFFIX)
+        )
+
+    def _map(self, code):
+        records = self._maps.get(code)
+        if records is None:
+            path = os.path.join(self.directory, code + SUFFIX)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            count = size // self.dtype.itemsize
+            if count:
+                records = numpy.memmap(path, self.dtype, "r", shape=(count,))
+            else:
+                records = numpy.empty(0, self.dtype)
+            self._maps[code] = records
+        return records
+
+    @staticmethod
+    def _tlong(value):
+        if isinstance(value, datetime.datetime):
+            return int(value.timestamp() * 1000)
+        return int(value * 1000)
+
+    def ticks(self, code: str, start=None, end=None):
+        """Return the records of code with start <= time < end
+
+        start and end are datetimes or timestamps in seconds, as
+        Quote.timestamp. The result is a read only view of the file.
+        """
+        records = self._map(code)
+        tlong = records["tlong"]
+        lo = 0 if start is None else tlong.searchsorted(self._tlong(start))
+        hi = len(records) if end is None else tlong.searchsorted(self._tlong(end))
+        return records[lo:hi]
+
+    def field(self, code: str, name: str, start=None, end=None):
+        """Return a field of the records of code, see ticks"""
+        return self.ticks(code, start, end)[name]
+
+    def load(self, start=None, end=None) -> dict:
+        """Return {code: ticks} of every symbol of the day"""
+        return {code: self.ticks(code, start, end) for code in self.symbols()}
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import math
 import pandas as pd
 import concurrent.futures
 
@@ -17,11 +18,14 @@ def load_interested_stocks(input_csv_name):
     df = pd.read_csv(input_csv_name)
     return df[IDX_COLUMN_NAME].to_numpy()  # Convert 'Idx' column to a 1-D array
 
-def fetch_stock_data(stock_idx):
-    """Fetch real-time stock data and return the stock object."""
-    realtime_stock_info_set = realtime.get(str(stock_idx))
-    realtime_stock_info = realtime_stock_info_set['info']
-    realtime_stock = realtime_stock_info_set['realtime']
+def fetch_realtime_data(stock_idxs):
+    """Fetch real-time data of all stocks, in a few batched requests."""
+    return realtime.get([str(stock_idx) for stock_idx in stock_idxs], quotes=True)
+
+def fetch_stock_data(stock_idx, realtime_data):
+    """Pick the stock's real-time data and return it with the stock object."""
+    realtime_stock = realtime_data[str(stock_idx)]
+    realtime_stock_info = realtime_stock['info']
     stock = Stock(str(stock_idx))
     return stock, realtime_stock_info, realtime_stock
 
@@ -32,10 +36,10 @@ def create_new_data_entry(stock, realtime_stock):
         date=last_data_entry.date,
         capacity=last_data_entry.capacity,
         turnover=last_data_entry.turnover,
-        open=float(realtime_stock['open']),
-        high=float(realtime_stock['high']),
-        low=float(realtime_stock['low']),
-        close=float(realtime_stock['latest_trade_price']),  # Use the new close value
+        open=realtime_stock.open,
+        high=realtime_stock.high,
+        low=realtime_stock.low,
+        close=realtime_stock.price,  # Use the new close value
         change=last_data_entry.change,
         transaction=last_data_entry.transaction,
     )
@@ -58,16 +62,24 @@ def main():
     interested_stocks = load_interested_stocks(INPUT_CSV_NAME)
     buy_list = []
     output_data = []
+    realtime_data = fetch_realtime_data(interested_stocks)
+    failed = realtime_data.get('failed', [])
+    if failed:
+        print(f'Real-time request failed for the stocks {failed}, skipped.')
+        interested_stocks = [idx for idx in interested_stocks if str(idx) not in failed]
 
     # Use ThreadPoolExecutor for concurrent fetching
     with concurrent.futures.ThreadPoolExecutor(max_workers=7) as executor:
         # Start the fetch operation for all stocks
-        future_to_stock = {executor.submit(fetch_stock_data, stock_idx): stock_idx for stock_idx in interested_stocks}
+        future_to_stock = {executor.submit(fetch_stock_data, stock_idx, realtime_data): stock_idx for stock_idx in interested_stocks}
 
         for future in concurrent.futures.as_completed(future_to_stock):
             stock_idx = future_to_stock[future]
             try:
                 stock, realtime_stock_info, realtime_stock = future.result()
+                if math.isnan(realtime_stock.price):
+                    print(f'No trade yet for the stock #{stock_idx}, skipped.')
+                    continue
                 stock = create_new_data_entry(stock, realtime_stock)
 
                 buy_signal = analyze_stock(stock)
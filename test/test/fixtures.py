@@ -0,0 +1,49 @@
+import datetime
+import itertools
+
+from twstock import stock
+from twstock.throttle import RateLimiter
+
+START = datetime.datetime(2020, 1, 1)
+
+
+def random_walk(rnd, price, volume=5):
+    """Yield the daily rows of a random walk from START on
+
+    Prices on a 0.05 tick hit rounding ties of the averages often.
+    """
+    for day in itertools.count():
+        price = max(0.05, price + rnd.randint(-3, 3) * 0.05)
+        close = round(round(price / 0.05) * 0.05, 2)
+        yield stock.DATATUPLE(
+            START + datetime.timedelta(days=day),
+            rnd.randint(1, volume),
+            1,
+            round(close + rnd.randint(-2, 2) * 0.05, 2),
+            0.0,
+            0.0,
+            close,
+            0.0,
+            1,
+        )
+
+
+def make_history(rnd, days):
+    return list(itertools.islice(random_walk(rnd, rnd.uniform(20, 200)), days))
+
+
+def make_stock(rnd, days, sid="2330"):
+    target = stock.Stock("2330", initial_fetch=False)
+    target.sid = sid
+    target.data = make_history(rnd, days)
+    return target
+
+
+class CountingRateLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(rate=None, base_delay=0.0)
+        self.throttles = 0
+
+    def throttled(self, url):
+        self.throttles += 1
+        return super().throttled(url)
@@ -1,3 +1,6 @@
+import datetime
+import math
+import random
 import unittest
 from twstock import stock
 from twstock import analytics
@@ -49,6 +52,31 @@ class AnalyticsTest(unittest.TestCase):
         self.assertEqual(ng_result, legacy_result)
         self.assertEqual(ng_result, [55.0, 65.0, 72.5])
 
+    def test_moving_average_long_windows(self):
+        rnd = random.Random(0)
+        # Prices on a 0.05 tick hit rounding ties of the average often
+        data = [round(rnd.uniform(10, 20) * 20) / 20 for _ in range(1000)]
+        data += [round(rnd.uniform(100, 1000), 2) for _ in range(1000)]
+
+        numpy = analytics.numpy
+        try:
+            for module_numpy in (numpy, None):
+                analytics.numpy = module_numpy
+                for days in (1, 3, 6, 60, 120, 240, 2000, 2001):
+                    ng_result = self.ng.moving_average(data, days)
+                    legacy_result = self.legacy.moving_average(data[:], days)
+                    self.assertEqual(ng_result, legacy_result)
+        finally:
+            analytics.numpy = numpy
+
+    def test_moving_average_nan(self):
+        data = [10.0] * 100
+        data[50] = float("nan")
+        ng_result = self.ng.moving_average(data, 3)
+        self.assertEqual(ng_result[:48], [10.0] * 48)
+        self.assertTrue(all(math.isnan(v) for v in ng_result[48:51]))
+        self.assertEqual(ng_result[51:], [10.0] * 47)
+
     def test_ma_bias_ratio(self):
         data = [50, 60, 70, 75, 80, 88, 102, 105, 106]
         self.ng.price = data
@@ -81,6 +109,83 @@ class AnalyticsTest(unittest.TestCase):
         ng_result = self.ng.ma_bias_ratio_pivot(data, 5, True)
         self.assertEqual(legacy_result, ng_result)
 
+    def test_rolling_max_min(self):
+        rnd = random.Random(0)
+        data = [rnd.randint(0, 20) / 2 for _ in range(50)]
+        for days in (1, 2, 5, 20, 50, 60):
+            windows = [data[i : i + days] for i in range(len(data) - days + 1)]
+            self.assertEqual(self.ng.rolling_max(data, days), list(map(max, windows)))
+            self.assertEqual(self.ng.rolling_min(data, days), list(map(min, windows)))
+            self.assertEqual(
+                self.ng.new_highs(data, days),
+                [data[i] > max(data[i - days : i]) for i in range(days, len(data))],
+            )
+            self.assertEqual(
+                self.ng.new_lows(data, days),
+                [data[i] < min(data[i - days : i]) for i in range(days, len(data))],
+            )
+
+    def test_channel_width(self):
+        self.ng.high = [10, 12, 11, 15, 13]
+        self.ng.low = [8, 9, 7, 12, 11]
+        self.assertEqual(self.ng.channel_width(3), [5, 8, 8])
+
+
+class IndicatorMemoTest(unittest.TestCase):
+    def setUp(self):
+        rnd = random.Random(0)
+        self.stock = stock.Stock("2330", initial_fetch=False)
+        self.stock.data = [
+            stock.DATATUPLE(
+                datetime.datetime(2017, 1, 1) + datetime.timedelta(days=i),
+                rnd.randint(1, 10**7),
+                1,
+                round(rnd.uniform(90, 110), 2),
+                0.0,
+                0.0,
+                round(rnd.uniform(90, 110), 2),
+                0.0,
+                1,
+            )
+            for i in range(40)
+        ]
+        self.ng = analytics.Analytics()
+
+    def test_memoized(self):
+        price = self.stock.price
+        result = self.stock.moving_average(price, 3)
+        self.assertIs(self.stock.moving_average(self.stock.price, 3), result)
+        self.assertEqual(result, self.ng.moving_average(list(price), 3))
+        self.assertIsNot(self.stock.moving_average(price, 6), result)
+        self.assertIsNot(self.stock.moving_average(self.stock.capacity, 3), result)
+        with self.assertRaises(TypeError):
+            result.append(1.0)
+
+        self.ng.price = list(price)
+        bias = self.stock.ma_bias_ratio(3, 6)
+        self.assertIs(self.stock.ma_bias_ratio(3, 6), bias)
+        self.assertEqual(bias, self.ng.ma_bias_ratio(3, 6))
+        self.assertEqual(
+            self.stock.ma_bias_ratio_pivot(bias, 5, True),
+            self.ng.ma_bias_ratio_pivot(list(bias), 5, True),
+        )
+        self.assertEqual(
+            self.stock.continuous(result), self.ng.continuous(list(result))
+        )
+
+    def test_invalidated(self):
+        bfp = analytics.BestFourPoint(self.stock)
+        before = (bfp.best_four_point(), self.stock.moving_average(self.stock.price, 3))
+
+        row = self.stock.data[-1]._replace(close=self.stock.price[-1] + 5)
+        self.stock.data.append(row)
+        result = self.stock.moving_average(self.stock.price, 3)
+        self.assertIsNot(result, before[1])
+        self.assertEqual(result, self.ng.moving_average(list(self.stock.price), 3))
+
+        del self.stock.data[-1]
+        self.assertEqual(bfp.best_four_point(), before[0])
+
 
 class BestFourPointTest(unittest.TestCase):
     @classmethod
@@ -0,0 +1,97 @@
+import math
+import random
+import unittest
+
+from twstock import analytics
+from twstock import backtest
+from twstock import stock
+from twstock.test.fixtures import make_stock
+
+
+class BacktestTest(unittest.TestCase):
+    def setUp(self):
+        rnd = random.Random(0)
+        self.stocks = [
+            make_stock(rnd, rnd.choice([3, 20, 60]), str(i)) for i in range(10)
+        ]
+
+    def best_four_points(self, target, *params):
+        """BestFourPoint of every prefix of target's history"""
+        long = params[1] if params else 6
+        for days in range(1, len(target.data) + 1):
+            prefix = stock.Stock("2330", initial_fetch=False)
+            prefix.data = target.data[:days]
+            yield analytics.BestFourPoint(prefix, *params) if days >= long else None
+
+    def test_matches_best_four_point(self):
+        self.check_best_four_point()
+
+    def test_params(self):
+        self.check_best_four_point(2, 5, 4)
+        self.check_best_four_point(5, 10, 7)
+
+    def check_best_four_point(self, *params):
+        result = backtest.backtest(
+            self.stocks, **dict(zip(("short", "long", "sample_size"), params))
+        )
+        width = result.matrix.price.shape[1]
+        for target in self.stocks:
+            row = result.matrix.index(target.sid)
+            offset = width - len(target.data)
+            for day, bfp in enumerate(self.best_four_points(target, *params)):
+                buy, sell = (
+                    result.buy[row, offset + day],
+                    result.sell[row, offset + day],
+                )
+                if bfp is None:
+                    self.assertFalse(buy or sell)
+                    continue
+                expected = bfp.best_four_point()
+                self.assertEqual(buy, bool(expected and expected[0]))
+                self.assertEqual(sell, bool(expected and not expected[0]))
+                self.assertEqual(
+                    tuple(result.buy_rules[:, row, offset + day]),
+                    (
+                        bfp.best_buy_1(),
+                        bfp.best_buy_2(),
+                        bfp.best_buy_3(),
+                        bfp.best_buy_4(),
+                    ),
+                )
+                self.assertEqual(
+                    result.buy_pivots[row, offset + day], bfp.mins_bias_ratio()[0]
+                )
+                self.assertEqual(
+                    result.sell_pivots[row, offset + day], bfp.plus_bias_ratio()[0]
+                )
+
+    def test_use_pivot(self):
+        plain = backtest.backtest(self.stocks)
+        gated = backtest.backtest(self.stocks, use_pivot=True)
+        self.assertTrue((gated.buy <= plain.buy).all())
+        self.assertTrue((gated.buy == plain.buy & plain.buy_pivots).all())
+
+    def test_forward_returns(self):
+        result = backtest.backtest(self.stocks)
+        returns = result.forward_returns(5)
+        target = max(self.stocks, key=lambda s: len(s.data))
+        row = result.matrix.index(target.sid)
+        self.assertAlmostEqual(
+            returns[row, -6], target.price[-1] / target.price[-6] - 1
+        )
+        self.assertTrue(math.isnan(returns[row, -5]))
+        with self.assertRaises(ValueError):
+            result.forward_returns(0)
+
+    def test_summary(self):
+        result = backtest.backtest(self.stocks)
+        summary = result.summary(horizons=(1, 5))
+        self.assertEqual(
+            [(s.signal, s.horizon) for s in summary],
+            [("buy", 1), ("sell", 1), ("buy", 5), ("sell", 5)],
+        )
+        returns = result.forward_returns(5)
+        buys = returns[result.buy & (returns == returns)]
+        self.assertEqual(summary[2].count, len(buys))
+        self.assertAlmostEqual(summary[2].mean_return, buys.mean())
+        self.assertAlmostEqual(summary[2].win_rate, (buys > 0).mean())
@@ -0,0 +1,80 @@
+import datetime
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from twstock import stock
+from twstock.cache import get_month_cache, configure_month_cache, reset_month_cache
+from twstock.cache import FileMonthCache, NoMonthCache
+
+ROW = [
+    datetime.datetime(2017, 5, 2),
+    45851963,
+    9053856108,
+    198.5,
+    199.0,
+    195.5,
+    196.5,
+    2.0,
+    15718,
+]
+
+
+class MonthCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = FileMonthCache(self.path, current_month_ttl=60)
+        reset_month_cache()
+
+    def tearDown(self):
+        reset_month_cache()
+        shutil.rmtree(self.path)
+
+    def test_configure(self):
+        self.assertIsInstance(get_month_cache(), NoMonthCache)
+        configure_month_cache(self.cache)
+        self.assertIs(get_month_cache(), self.cache)
+        reset_month_cache()
+        self.assertIsInstance(get_month_cache(), NoMonthCache)
+
+    def test_closed_month_roundtrip(self):
+        self.assertIsNone(self.cache.get("twse", "2330", 2017, 5))
+        self.cache.set("twse", "2330", 2017, 5, [ROW])
+        self.assertEqual(self.cache.get("twse", "2330", 2017, 5), [ROW])
+        self.assertIsNone(self.cache.get("tpex", "2330", 2017, 5))
+
+    def test_current_month_ttl(self):
+        today = datetime.datetime.today()
+        self.cache.set("twse", "2330", today.year, today.month, [ROW])
+        self.assertEqual(self.cache.get("twse", "2330", today.year, today.month), [ROW])
+
+        path = self.cache._month_path("twse", "2330", today.year, today.month)
+        expired = time.time() - 120
+        os.utime(path, (expired, expired))
+        self.assertIsNone(self.cache.get("twse", "2330", today.year, today.month))
+
+    def test_partial_month_after_close(self):
+        # Written on 2017-05-15, before May closed, read after it closed
+        self.cache.set("twse", "2330", 2017, 5, [ROW])
+        path = self.cache._month_path("twse", "2330", 2017, 5)
+        written = datetime.datetime(2017, 5, 15).timestamp()
+        os.utime(path, (written, written))
+        self.assertIsNone(self.cache.get("twse", "2330", 2017, 5))
+
+        # Written on 2017-06-01, after May closed
+        written = datetime.datetime(2017, 6, 1).timestamp()
+        os.utime(path, (written, written))
+        self.assertEqual(self.cache.get("twse", "2330", 2017, 5), [ROW])
+
+    def test_fetcher_uses_cache(self):
+        configure_month_cache(self.cache)
+        self.cache.set("twse", "2330", 2017, 5, [ROW])
+        data = stock.TWSEFetcher().fetch(2017, 5, "2330")
+        self.assertEqual(data["stat"], "OK")
+        self.assertEqual(data["data"], [stock.DATATUPLE(*ROW)])
+
+        self.cache.set("tpex", "6223", 2017, 5, [ROW])
+        data = stock.TPEXFetcher().fetch(2017, 5, "6223")
+        self.assertEqual(data, {"stat": "OK", "data": [stock.DATATUPLE(*ROW)]})
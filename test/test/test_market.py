@@ -0,0 +1,150 @@
+import datetime
+import unittest
+
+from twstock import market
+from twstock import stock
+
+TWSE_PAYLOAD = {
+    "stat": "OK",
+    "tables": [
+        {
+            "title": "價格指數",
+            "fields": ["指數", "收盤指數"],
+            "data": [["發行量加權", "1"]],
+        },
+        {
+            "fields": [
+                "證券代號",
+                "證券名稱",
+                "成交股數",
+                "成交筆數",
+                "成交金額",
+                "開盤價",
+                "最高價",
+                "最低價",
+                "收盤價",
+                "漲跌(+/-)",
+                "漲跌價差",
+                "最後揭示買價",
+            ],
+            "data": [
+                [
+                    "2330",
+                    "台積電",
+                    "45,851,963",
+                    "15,718",
+                    "9,053,856,108",
+                    "198.50",
+                    "199.00",
+                    "195.50",
+                    "196.50",
+                    "<p style= color:green>-</p>",
+                    "2.00",
+                    "196.50",
+                ],
+                [
+                    "9999",
+                    "停牌",
+                    "0",
+                    "0",
+                    "0",
+                    "--",
+                    "--",
+                    "--",
+                    "--",
+                    "X",
+                    "0.00",
+                    "--",
+                ],
+            ],
+        },
+    ],
+}
+
+TPEX_PAYLOAD = {
+    "tables": [
+        {
+            "fields": [
+                "代號",
+                "名稱",
+                "收盤 ",
+                "漲跌",
+                "開盤 ",
+                "最高 ",
+                "最低",
+                "均價 ",
+                "成交股數  ",
+                "成交金額(元)",
+                "成交筆數 ",
+            ],
+            "data": [
+                [
+                    "6223",
+                    "旺矽",
+                    "196.50",
+                    "+2.00 ",
+                    "198.50",
+                    "199.00",
+                    "195.50",
+                    "197.00",
+                    "45,851",
+                    "9,053,856",
+                    "718",
+                ]
+            ],
+        }
+    ]
+}
+
+
+class SnapshotFetcherTest(unittest.TestCase):
+    def setUp(self):
+        self.date = datetime.date(2017, 5, 2)
+
+    def test_twse_purify(self):
+        snapshot = market.TWSESnapshotFetcher().purify(self.date, TWSE_PAYLOAD)
+        self.assertCountEqual(snapshot.keys(), ["2330", "9999"])
+        self.assertEqual(
+            snapshot["2330"],
+            stock.DATATUPLE(
+                datetime.datetime(2017, 5, 2),
+                45851963,
+                9053856108,
+                198.5,
+                199.0,
+                195.5,
+                196.5,
+                -2.0,
+                15718,
+            ),
+        )
+        self.assertIsNone(snapshot["9999"].close)
+        self.assertEqual(snapshot["9999"].change, 0.0)
+
+    def test_twse_closed_day(self):
+        payload = {"stat": "很抱歉，沒有符合條件的資料!"}
+        self.assertEqual(market.TWSESnapshotFetcher().purify(self.date, payload), {})
+
+    def test_tpex_purify(self):
+        snapshot = market.TPEXSnapshotFetcher().purify(self.date, TPEX_PAYLOAD)
+        self.assertEqual(snapshot["6223"].capacity, 45851)
+        self.assertEqual(snapshot["6223"].close, 196.5)
+        self.assertEqual(snapshot["6223"].change, 2.0)
+        self.assertEqual(snapshot["6223"].transaction, 718)
+
+    def test_build_histories(self):
+        twse = market.TWSESnapshotFetcher()
+        snapshots = [
+            (self.date, twse.purify(self.date, TWSE_PAYLOAD)),
+            (
+                self.date + datetime.timedelta(days=1),
+                twse.purify(self.date, TWSE_PAYLOAD),
+            ),
+        ]
+        histories = market.build_histories(snapshots, sids={"2330"})
+        self.assertEqual(list(histories), ["2330"])
+        self.assertEqual(len(histories["2330"]), 2)
+
+        stocks = market.build_stocks(snapshots)
+        self.assertEqual(stocks["2330"].price, [196.5, 196.5])
+        self.assertNotIn("9999", stocks)
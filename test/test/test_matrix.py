@@ -0,0 +1,147 @@
+import datetime
+import math
+import random
+import unittest
+
+import numpy
+
+from twstock import analytics
+from twstock import matrix
+from twstock.stock import DATATUPLE
+
+
+def make_histories(count=40, seed=0):
+    rnd = random.Random(seed)
+    histories = {}
+    for i in range(count):
+        price = rnd.uniform(10, 500)
+        rows = []
+        for day in range(rnd.randint(0, 120)):
+            # Prices on a 0.05 tick hit rounding ties of the average often
+            price = max(0.05, price + rnd.choice([-1, 0, 1]) * 0.05 * rnd.randint(0, 4))
+            date = datetime.datetime(2020, 1, 1) + datetime.timedelta(days=day + i % 7)
+            close = round(price, 2)
+            rows.append(
+                DATATUPLE(
+                    date, rnd.randint(1, 10**6), 1, close, close, close, close, 0.0, 1
+                )
+            )
+        histories[str(1000 + i)] = rows
+    return histories
+
+
+class StockMatrixTest(unittest.TestCase):
+    def setUp(self):
+        self.histories = make_histories()
+        self.matrix = matrix.StockMatrix.from_histories(self.histories)
+        self.ng = analytics.Analytics()
+
+    def row(self, values, sid):
+        values = values[self.matrix.index(sid)]
+        return values[~numpy.isnan(values)].tolist()
+
+    def test_round2(self):
+        rnd = random.Random(1)
+        values = [k / 200 for k in range(-2000, 2000)] + [k / 8 for k in range(-80, 80)]
+        values += [rnd.uniform(-1000, 1000) for _ in range(1000)]
+        result = matrix._round2(numpy.array(values)).tolist()
+        self.assertEqual([repr(v) for v in result], [repr(round(v, 2)) for v in values])
+
+    def test_moving_average(self):
+        for days in (1, 3, 6, 20, 60):
+            result = self.matrix.moving_average(self.matrix.price, days)
+            self.assertEqual(result.shape, self.matrix.price.shape)
+            for sid, rows in self.histories.items():
+                price = [row.close for row in rows]
+                self.assertEqual(
+                    self.row(result, sid), self.ng.moving_average(price, days)
+                )
+
+    def test_ma_bias_ratio_and_pivot(self):
+        bias = self.matrix.ma_bias_ratio(3, 6)
+        for position in (False, True):
+            pivots, offsets, values = self.matrix.ma_bias_ratio_pivot(bias, 5, position)
+            for sid, rows in self.histories.items():
+                self.ng.price = [row.close for row in rows]
+                expected = self.ng.ma_bias_ratio(3, 6)
+                self.assertEqual(self.row(bias, sid), expected)
+
+                i = self.matrix.index(sid)
+                if expected:
+                    self.assertEqual(
+                        (bool(pivots[i]), int(offsets[i]), float(values[i])),
+                        self.ng.ma_bias_ratio_pivot(expected, 5, position),
+                    )
+                else:
+                    self.assertEqual((pivots[i], offsets[i]), (False, -1))
+                    self.assertTrue(math.isnan(values[i]))
+
+    def test_rolling_max_min(self):
+        for days in (1, 5, 20):
+            highs = self.matrix.rolling_max(self.matrix.high, days)
+            lows = self.matrix.rolling_min(self.matrix.low, days)
+            width = self.matrix.channel_width(days)
+            new_highs = self.matrix.new_highs(self.matrix.high, days)
+            for sid, rows in self.histories.items():
+                high = [row.high for row in rows]
+                low = [row.low for row in rows]
+                self.assertEqual(self.row(highs, sid), self.ng.rolling_max(high, days))
+                self.assertEqual(self.row(lows, sid), self.ng.rolling_min(low, days))
+                self.assertEqual(
+                    self.row(width, sid),
+                    [h - l for h, l in zip(self.row(highs, sid), self.row(lows, sid))],
+                )
+                flags = new_highs[self.matrix.index(sid)].tolist()
+                self.assertEqual(
+                    flags[len(flags) - len(high) + days :],
+                    self.ng.new_highs(high, days),
+                )
+
+    def test_rolling_pivot(self):
+        bias = self.matrix.ma_bias_ratio(3, 6)
+        for position in (False, True):
+            rolling = self.matrix.rolling_pivot(bias, 5, position)
+            for day in range(1, bias.shape[1] + 1):
+                last = self.matrix.ma_bias_ratio_pivot(bias[:, :day], 5, position)
+                for expected, result in zip(last, rolling):
+                    numpy.testing.assert_array_equal(result[:, day - 1], expected)
+
+    def test_continuous(self):
+        average = self.matrix.moving_average(self.matrix.price, 3)
+        result = self.matrix.continuous(average)
+        for sid, rows in self.histories.items():
+            expected = self.ng.moving_average([row.close for row in rows], 3)
+            if len(expected) >= 2:
+                self.assertEqual(
+                    result[self.matrix.index(sid)], self.ng.continuous(expected)
+                )
+            else:
+                self.assertEqual(result[self.matrix.index(sid)], 0)
+
+    def test_date_align(self):
+        aligned = matrix.StockMatrix.from_histories(self.histories, align="date")
+        self.assertEqual(aligned.dates, sorted(aligned.dates))
+        for sid, rows in self.histories.items():
+            i = aligned.index(sid)
+            for row in rows[:5]:
+                j = aligned.dates.index(row.date)
+                self.assertEqual(aligned.price[i, j], row.close)
+                self.assertEqual(aligned.capacity[i, j], row.capacity)
+        self.assertEqual(
+            numpy.isnan(aligned.price).sum(),
+            aligned.price.size - sum(map(len, self.histories.values())),
+        )
+
+        with self.assertRaises(ValueError):
+            matrix.StockMatrix.from_histories(self.histories, align="month")
+
+    def test_missing_values(self):
+        rows = self.histories["1001"][:3]
+        rows[1] = rows[1]._replace(capacity=None, close=None)
+        built = matrix.StockMatrix.from_histories({"1001": rows, "1002": []})
+        self.assertEqual(built.price.shape, (2, 3))
+        self.assertTrue(numpy.isnan(built.capacity[0, 1]))
+        self.assertTrue(numpy.isnan(built.price[0, 1]))
+        self.assertEqual(built.capacity[0, 2], rows[2].capacity)
+        self.assertTrue(numpy.isnan(built.price[1]).all())
+        self.assertEqual(matrix.StockMatrix.from_histories({}).price.shape, (0, 0))
@@ -0,0 +1,54 @@
+import random
+import unittest
+
+from twstock import analytics
+from twstock import pipeline
+from twstock.test.fixtures import make_stock
+
+
+class PipelineTest(unittest.TestCase):
+    def test_shared_nodes(self):
+        close = pipeline.column("close")
+        self.assertEqual(
+            pipeline.moving_average(close, 3), pipeline.moving_average(close, 3)
+        )
+
+        p = pipeline.Pipeline()
+        p.add("bias", pipeline.bias_ratio(3, 6))
+        p.add("trend", pipeline.continuous(pipeline.moving_average(close, 3)))
+        p.add("ma6", pipeline.moving_average(close, 6))
+        ops = [node.op for node in p.plan()]
+        self.assertEqual(ops.count("column"), 1)
+        self.assertEqual(ops.count("moving_average"), 2)
+        self.assertEqual(len(ops), 5)
+        for index, node in enumerate(p.plan()):
+            for child in node.inputs:
+                self.assertLess(p.plan().index(child), index)
+
+    def test_matches_analytics(self):
+        target = make_stock(random.Random(1), 40)
+        close = pipeline.column("close")
+        p = pipeline.Pipeline(
+            {
+                "ma5": pipeline.moving_average(close, 5),
+                "bias": pipeline.bias_ratio(5, 10),
+                "trend": pipeline.continuous(pipeline.moving_average(close, 5)),
+            }
+        )
+        result = p.run(target)
+        self.assertEqual(result["ma5"], target.moving_average(target.price, 5))
+        self.assertEqual(result["bias"], target.ma_bias_ratio(5, 10))
+        self.assertEqual(
+            result["trend"], target.continuous(target.moving_average(target.price, 5))
+        )
+        self.assertEqual(p.run(target.data), result)
+
+    def test_best_four_point(self):
+        rnd = random.Random(0)
+        p = pipeline.best_four_point_pipeline()
+        for _ in range(100):
+            target = make_stock(rnd, rnd.choice([6, 7, 10, 31]))
+            bfp = analytics.BestFourPoint(target)
+            result = p.run(target)
+            for name, value in result.items():
+                self.assertEqual(value, getattr(bfp, name)(), name)
@@ -1,8 +1,123 @@
 # -*- coding: utf-8 -*-
 
+import asyncio
+import http.server
+import json
+import math
+import threading
 import unittest
+import urllib.parse
+
 import twstock
 from twstock import realtime
+from twstock.test.fixtures import CountingRateLimiter
+from twstock.throttle import RateLimiter, configure_rate_limiter, reset_rate_limiter
+
+
+class MISHandler(http.server.BaseHTTPRequestHandler):
+    """Stand-in for mis.twse.com.tw, quotes need the index.jsp cookie"""
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body, content_type="application/json", headers=()):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for header in headers:
+            self.send_header(*header)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        mis = self.server.mis
+        url = urllib.parse.urlparse(self.path)
+        if url.path == "/stock/index.jsp":
+            with mis.lock:
+                mis.handshakes += 1
+                cookie = "s%d" % mis.handshakes
+                mis.cookies.add(cookie)
+            self.reply(
+                200,
+                "<html></html>",
+                "text/html",
+                [("Set-Cookie", "JSESSIONID=%s; Path=/" % cookie)],
+            )
+            return
+
+        if mis.block_with:
+            self.reply(200, "<html>blocked</html>", mis.block_with)
+            return
+        cookie = (self.headers.get("Cookie") or "").partition("JSESSIONID=")[2]
+        with mis.lock:
+            mis.requests.append(url.query)
+            accepted = cookie in mis.cookies
+        if not accepted:
+            if mis.reject_with_html:
+                self.reply(200, "<html>session expired</html>", "text/html")
+            else:
+                self.reply(403, "forbidden", "text/html")
+            return
+        channels = urllib.parse.parse_qs(url.query)["ex_ch"][0].split("|")
+        if any(channel.split("_", 1)[1][:-3] in mis.fail_codes for channel in channels):
+            self.reply(500, "error", "text/plain")
+            return
+        quotes = [mis.quote(channel) for channel in channels]
+        self.reply(
+            200, json.dumps({"msgArray": quotes, "rtcode": "0000", "rtmessage": "OK"})
+        )
+
+
+class MISServer(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.handshakes = 0
+        self.cookies = set()
+        self.requests = []
+        self.reject_with_html = False
+        # Content type of a block page answering every quote request, if set
+        self.block_with = None
+        # Quote requests asking for any of these codes fail with HTTP 500
+        self.fail_codes = set()
+        self.tick = 0
+        self.prices = {}
+
+    def quote(self, channel):
+        code = channel.split("_", 1)[1][: -len(".tw")]
+        return {
+            "c": code,
+            "ch": code + ".tw",
+            "n": code,
+            "nf": code,
+            "tlong": str(1728628200000 + self.tick * 5000),
+            "z": self.prices.get(code, "100.0000"),
+            "tv": "1",
+            "v": "10",
+            "b": "99.0000_98.0000_",
+            "g": "1_2_",
+            "a": "101.0000_102.0000_",
+            "f": "3_4_",
+            "o": "99.0000",
+            "h": "101.0000",
+            "l": "98.0000",
+        }
+
+    def __enter__(self):
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), MISHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mis = self
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        url = "http://127.0.0.1:%d/stock/" % self.httpd.server_port
+        self.client = realtime.RealtimeClient(
+            url + "index.jsp", url + "api/getStockInfo.jsp?ex_ch={stock_id}&_={time}"
+        )
+        return self
+
+    def __exit__(self, *exc):
+        self.client.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
 
 
 class RealtimeTest(unittest.TestCase):
@@ -71,3 +186,218 @@ class MockRealtimeTest(unittest.TestCase):
         self.assertEqual(s["2330"]["info"]["code"], "2330")
         self.assertEqual(s["2330"]["realtime"]["latest_trade_price"], "214.50")
         self.assertTrue(s["2337"]["success"])
+
+
+class RealtimeClientTest(unittest.TestCase):
+    def setUp(self):
+        configure_rate_limiter(RateLimiter(rate=None, base_delay=0.0))
+
+    def tearDown(self):
+        realtime.reset_realtime_client()
+        reset_rate_limiter()
+
+    def test_one_handshake(self):
+        with MISServer() as mis:
+            for _ in range(3):
+                self.assertEqual(mis.client.get_raw("2330")["msgArray"][0]["c"], "2330")
+            self.assertEqual(mis.handshakes, 1)
+            self.assertEqual(len(mis.requests), 3)
+
+    def test_refresh_on_rejection(self):
+        with MISServer() as mis:
+            mis.client.get_raw("2330")
+            mis.cookies.clear()
+            self.assertIn("msgArray", mis.client.get_raw("2330"))
+            self.assertEqual(mis.handshakes, 2)
+
+            mis.cookies.clear()
+            mis.reject_with_html = True
+            realtime.configure_realtime_client(mis.client)
+            self.assertEqual(realtime.get("2330")["info"]["code"], "2330")
+            self.assertEqual(mis.handshakes, 3)
+
+    def test_block_page_throttles(self):
+        limiter = CountingRateLimiter()
+        configure_rate_limiter(limiter)
+        with MISServer() as mis:
+            mis.block_with = "text/plain"
+            self.assertEqual(mis.client.get_raw("2330")["rtcode"], "5000")
+            self.assertEqual(limiter.throttles, 0)
+
+            mis.block_with = "text/html"
+            self.assertEqual(mis.client.get_raw("2330")["rtcode"], "5000")
+            self.assertEqual(limiter.throttles, 1)
+
+    def test_threads_share_session(self):
+        with MISServer() as mis:
+            results = []
+
+            def poll():
+                for _ in range(5):
+                    results.append(mis.client.get_raw("2330")["rtcode"])
+
+            threads = [threading.Thread(target=poll) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(results, ["0000"] * 40)
+            self.assertEqual(mis.handshakes, 1)
+
+            mis.cookies.clear()
+            threads = [threading.Thread(target=poll) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(mis.handshakes, 2)
+
+
+class RealtimeChunkTest(unittest.TestCase):
+    def setUp(self):
+        configure_rate_limiter(RateLimiter(rate=None, base_delay=0.0))
+
+    def tearDown(self):
+        realtime.reset_realtime_client()
+        reset_rate_limiter()
+
+    def test_chunk_stock_ids(self):
+        stocks = [str(1000 + i) for i in range(250)]
+        chunks = realtime.chunk_stock_ids(stocks + stocks[:10])
+        self.assertEqual([len(chunk) for chunk in chunks], [84, 83, 83])
+        self.assertEqual(sum(chunks, []), stocks)
+        self.assertEqual(realtime.chunk_stock_ids(["2330"]), [["2330"]])
+        for chunk in realtime.chunk_stock_ids(stocks, size=1000):
+            self.assertLessEqual(
+                len(realtime.join_stock_id(chunk)), realtime.MAX_EX_CH_LENGTH
+            )
+
+    def test_get_many(self):
+        stocks = [str(1000 + i) for i in range(250)]
+        with MISServer() as mis:
+            realtime.configure_realtime_client(mis.client)
+            result = realtime.get(stocks)
+            self.assertEqual(len(mis.requests), 3)
+            self.assertEqual(sorted(result), stocks)
+            self.assertEqual(result["1100"]["info"]["code"], "1100")
+            self.assertIsInstance(result["1100"], dict)
+            json.dumps(result)
+
+            quotes = realtime.get(stocks, quotes=True)
+            self.assertEqual(len(mis.requests), 6)
+            self.assertEqual(quotes["1100"].price, 100.0)
+            self.assertEqual(quotes["1100"], result["1100"])
+
+    def test_get_many_failed_chunk(self):
+        stocks = [str(1000 + i) for i in range(250)]
+        chunks = realtime.chunk_stock_ids(stocks)
+        with MISServer() as mis:
+            realtime.configure_realtime_client(mis.client)
+            mis.fail_codes = {"1000"}
+            result = realtime.get(stocks)
+            self.assertEqual(result["failed"], chunks[0])
+            self.assertNotIn("1000", result)
+            self.assertEqual(result["1100"]["info"]["code"], "1100")
+
+            mis.fail_codes = set(stocks)
+            result = realtime.get(stocks)
+            self.assertFalse(result["success"])
+            self.assertEqual(result["failed"], stocks)
+            self.assertEqual(realtime.get(["1000"])["failed"], ["1000"])
+
+            mis.fail_codes = set()
+            self.assertNotIn("failed", realtime.get(stocks))
+
+
+class QuoteTest(unittest.TestCase):
+    def test_parsed_fields(self):
+        quote = realtime.Quote(MISServer().quote("tse_2330.tw"))
+        self.assertEqual(quote.code, "2330")
+        self.assertEqual(quote.price, 100.0)
+        self.assertEqual((quote.trade_volume, quote.volume), (1, 10))
+        self.assertEqual(quote.bid_prices, (99.0, 98.0))
+        self.assertEqual(quote.ask_volumes, (3, 4))
+        self.assertEqual((quote.open, quote.high, quote.low), (99.0, 101.0, 98.0))
+        self.assertEqual(quote.timestamp, 1728628200.0)
+        self.assertFalse(hasattr(quote, "__dict__"))
+
+    def test_no_trade(self):
+        data = MISServer().quote("tse_2330.tw")
+        data.update(z="-", tv="-", b="-_98.0000_")
+        quote = realtime.Quote(data)
+        self.assertTrue(math.isnan(quote.price))
+        self.assertEqual(quote.trade_volume, 0)
+        self.assertTrue(math.isnan(quote.bid_prices[0]))
+        self.assertEqual(quote["realtime"]["latest_trade_price"], "-")
+
+    def test_dict_view(self):
+        data = MISServer().quote("tse_2330.tw")
+        quote = realtime.Quote(data)
+        self.assertEqual(quote, realtime.format_stock_info(data))
+        self.assertEqual(quote.to_dict(), realtime.format_stock_info(data))
+        self.assertEqual(quote["info"]["time"], quote.time)
+        self.assertEqual(quote["realtime"]["best_bid_price"], ["99.0000", "98.0000"])
+        self.assertTrue(quote["success"])
+        self.assertCountEqual(quote, ["timestamp", "info", "realtime", "success"])
+        with self.assertRaises(KeyError):
+            quote["code"]
+
+
+class RealtimeStreamTest(unittest.TestCase):
+    def setUp(self):
+        configure_rate_limiter(RateLimiter(rate=None, base_delay=0.0))
+
+    def tearDown(self):
+        realtime.reset_realtime_client()
+        reset_rate_limiter()
+
+    def quote(self, tlong, price):
+        return realtime.Quote(
+            {
+                "c": "2330",
+                "ch": "2330.tw",
+                "n": "",
+                "nf": "",
+                "tlong": tlong,
+                "z": price,
+            }
+        )
+
+    def test_quote_deltas(self):
+        deltas = realtime.QuoteDeltas()
+        first = {"2330": self.quote(1, "1.0"), "6223": self.quote(1, "2.0")}
+        self.assertEqual(deltas.update(first), first)
+        self.assertEqual(deltas.update(first), {})
+        self.assertEqual(deltas.update({"2330": self.quote(2, "1.0")}), {})
+        self.assertEqual(deltas.update({"2330": self.quote(1, "9.0")}), {})
+        self.assertEqual(
+            deltas.update({"2330": self.quote(3, "1.5"), "6223": self.quote(3, "2.0")}),
+            {"2330": self.quote(3, "1.5")},
+        )
+
+    def test_stream(self):
+        with MISServer() as mis:
+            realtime.configure_realtime_client(mis.client)
+            polls = realtime.stream(["1001", "1002"], interval=0.05, polls=3)
+            self.assertEqual(sorted(next(polls)), ["1001", "1002"])
+            mis.tick, mis.prices["1001"] = 1, "101.0000"
+            delta = next(polls)
+            self.assertEqual(list(delta), ["1001"])
+            self.assertEqual(
+                delta["1001"]["realtime"]["latest_trade_price"], "101.0000"
+            )
+            self.assertEqual(list(polls), [])
+            self.assertEqual(len(mis.requests), 3)
+
+    def test_astream(self):
+        async def collect():
+            return [
+                delta
+                async for delta in realtime.astream("1001", interval=0.05, polls=2)
+            ]
+
+        with MISServer() as mis:
+            realtime.configure_realtime_client(mis.client)
+            deltas = asyncio.run(collect())
+            self.assertEqual([list(delta) for delta in deltas], [["1001"]])
+            self.assertEqual(len(mis.requests), 2)
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from twstock.async_session import AsyncSessionPool, configure_async_session_pool
+from twstock.async_session import get_async_session_pool, reset_async_session_pool
+from twstock.replay import Recorder, ReplayServer, benchmark, fixture_key
+from twstock.replay import redirect_fetchers
+from twstock.session import SessionPool, configure_session_pool, reset_session_pool
+from twstock.stock import AsyncTWSEFetcher, Stock, TWSEFetcher
+from twstock.test.fixtures import CountingRateLimiter
+from twstock.throttle import RateLimiter, configure_rate_limiter, get_rate_limiter
+from twstock.throttle import reset_rate_limiter
+
+PAYLOAD = {
+    "stat": "OK",
+    "data": [
+        [
+            "113/01/02",
+            "1,000",
+            "593,000",
+            "590.00",
+            "593.00",
+            "589.00",
+            "593.00",
+            "+3.00",
+            "100",
+        ],
+        [
+            "113/01/03",
+            "2,000",
+            "1,156,000",
+            "584.00",
+            "585.00",
+            "576.00",
+            "578.00",
+            "-15.00",
+            "200",
+        ],
+    ],
+}
+PARAMS = "?date=20240101&stockNo=2330"
+
+
+def write_fixture(directory, path, payload):
+    os.makedirs(directory, exist_ok=True)
+    fixture = {
+        "url": path,
+        "content_type": "application/json",
+        "body": json.dumps(payload),
+    }
+    with open(os.path.join(directory, fixture_key(path)), "w") as f:
+        json.dump(fixture, f)
+
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        configure_rate_limiter(RateLimiter(rate=None, base_delay=0.0))
+
+    def tearDown(self):
+        reset_session_pool()
+        reset_rate_limiter()
+        shutil.rmtree(self.directory)
+
+    def test_fixture_key(self):
+        self.assertEqual(
+            fixture_key("http://www.twse.com.tw/a/b?x=1&y=2"),
+            fixture_key("http://127.0.0.1:8000/a/b?y=2&x=1&_=123"),
+        )
+        self.assertNotEqual(fixture_key("/a/b?x=1"), fixture_key("/a/b?x=2"))
+
+    def test_replay_fetch(self):
+        write_fixture(self.directory, "/exchangeReport/STOCK_DAY" + PARAMS, PAYLOAD)
+        with ReplayServer(self.directory) as server:
+            with redirect_fetchers(server.url):
+                data = TWSEFetcher().fetch(2024, 1, "2330")
+            self.assertEqual(server.requests, 1)
+
+        self.assertEqual(
+            TWSEFetcher.REPORT_URL, "http://www.twse.com.tw/exchangeReport/STOCK_DAY"
+        )
+        self.assertIsNone(TWSEFetcher.redirect_url)
+        self.assertEqual(data["stat"], "OK")
+        self.assertEqual(data["data"].column("close"), [593.0, 578.0])
+        self.assertEqual(data["data"].column("change"), [3.0, -15.0])
+
+    def test_record(self):
+        source = os.path.join(self.directory, "source")
+        recorded = os.path.join(self.directory, "recorded")
+        write_fixture(source, "/exchangeReport/STOCK_DAY" + PARAMS, PAYLOAD)
+        configure_session_pool(SessionPool(response_hooks=[Recorder(recorded)]))
+        with ReplayServer(source) as server:
+            with redirect_fetchers(server.url):
+                expected = TWSEFetcher().fetch(2024, 1, "2330")
+
+        # The recording replays the same responses without the source
+        with ReplayServer(recorded) as server:
+            with redirect_fetchers(server.url):
+                data = TWSEFetcher().fetch(2024, 1, "2330")
+        self.assertEqual(data["data"], expected["data"])
+
+    def test_missing_fixture(self):
+        with ReplayServer(self.directory) as server:
+            with redirect_fetchers(server.url):
+                data = TWSEFetcher().fetch(2024, 1, "2330", retry=2)
+            self.assertEqual(server.requests, 2)
+        self.assertEqual(data["data"], [])
+
+    def test_concurrent_requests(self):
+        write_fixture(self.directory, "/exchangeReport/STOCK_DAY" + PARAMS, PAYLOAD)
+        with ReplayServer(self.directory) as server:
+            with redirect_fetchers(server.url):
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    results = list(
+                        executor.map(
+                            lambda _: TWSEFetcher().fetch(2024, 1, "2330"), range(40)
+                        )
+                    )
+            self.assertEqual(server.requests, 40)
+        self.assertTrue(all(data["stat"] == "OK" for data in results))
+
+    def test_throttle_and_errors(self):
+        write_fixture(self.directory, "/exchangeReport/STOCK_DAY" + PARAMS, PAYLOAD)
+        with ReplayServer(self.directory, throttle_rate=1.0) as server:
+            with redirect_fetchers(server.url):
+                data = TWSEFetcher().fetch(2024, 1, "2330", retry=3)
+            self.assertEqual(server.requests, 3)
+        self.assertEqual(data["data"], [])
+
+        with ReplayServer(self.directory, error_rate=0.5, seed=1) as server:
+            with redirect_fetchers(server.url):
+                data = TWSEFetcher().fetch(2024, 1, "2330", retry=20)
+        self.assertEqual(data["data"].column("close"), [593.0, 578.0])
+
+    def test_benchmark_without_rate_limit(self):
+        write_fixture(self.directory, "/exchangeReport/STOCK_DAY" + PARAMS, PAYLOAD)
+        # A rate that would take minutes for the months until today
+        limiter = RateLimiter(rate=0.1, burst=1)
+        configure_rate_limiter(limiter)
+        with ReplayServer(self.directory) as server:
+            with redirect_fetchers(server.url):
+                rows, seconds, _ = benchmark(["2330"], 2024, 1, workers=4)
+        self.assertEqual(rows, 2)
+        self.assertLess(seconds, 10)
+        self.assertIs(get_rate_limiter(), limiter)
+
+    def test_throttle_reported_once(self):
+        write_fixture(self.directory, "/exchangeReport/STOCK_DAY" + PARAMS, PAYLOAD)
+        for status in (200, 403, 429, 503):
+            limiter = CountingRateLimiter()
+            configure_rate_limiter(limiter)
+            with ReplayServer(
+                self.directory, throttle_rate=1.0, throttle_status=status
+            ) as server:
+                with redirect_fetchers(server.url):
+                    TWSEFetcher().fetch(2024, 1, "2330", retry=3)
+            self.assertEqual(limiter.throttles, 3, status)
+
+        # Errors and missing fixtures are retried without backing off
+        limiter = CountingRateLimiter()
+        configure_rate_limiter(limiter)
+        with ReplayServer(self.directory, error_rate=1.0) as server:
+            with redirect_fetchers(server.url):
+                TWSEFetcher().fetch(2024, 1, "2330", retry=2)
+                TWSEFetcher().fetch(2024, 2, "2330", retry=2)
+            self.assertEqual(server.requests, 4)
+        self.assertEqual(limiter.throttles, 0)
+
+
+class AsyncReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        configure_rate_limiter(RateLimiter(rate=None, base_delay=0.0))
+        write_fixture(self.directory, "/exchangeReport/STOCK_DAY" + PARAMS, PAYLOAD)
+
+    def tearDown(self):
+        reset_async_session_pool()
+        reset_rate_limiter()
+        shutil.rmtree(self.directory)
+
+    def run_closing(self, coroutine):
+        async def run():
+            try:
+                return await coroutine
+            finally:
+                await get_async_session_pool().close()
+
+        return asyncio.run(run())
+
+    def test_async_fetch(self):
+        with ReplayServer(self.directory) as server:
+            with redirect_fetchers(server.url):
+                data = self.run_closing(AsyncTWSEFetcher().fetch(2024, 1, "2330"))
+            self.assertEqual(server.requests, 1)
+        self.assertEqual(data["stat"], "OK")
+        self.assertEqual(data["data"].column("close"), [593.0, 578.0])
+
+    def test_async_stock_matches_sync(self):
+        stock = Stock("2330", initial_fetch=False)
+        with ReplayServer(self.directory) as server:
+            with redirect_fetchers(server.url):
+                expected = stock.fetch(2024, 1)
+                data = self.run_closing(stock.afetch(2024, 1))
+        self.assertEqual(data, expected)
+
+    def test_async_throttle_and_errors(self):
+        with ReplayServer(self.directory, throttle_rate=1.0) as server:
+            with redirect_fetchers(server.url):
+                data = self.run_closing(
+                    AsyncTWSEFetcher().fetch(2024, 1, "2330", retry=3)
+                )
+            self.assertEqual(server.requests, 3)
+        self.assertEqual(data["data"], [])
+
+        with ReplayServer(self.directory, error_rate=0.5, seed=1) as server:
+            with redirect_fetchers(server.url):
+                data = self.run_closing(
+                    AsyncTWSEFetcher().fetch(2024, 1, "2330", retry=20)
+                )
+        self.assertEqual(data["data"].column("close"), [593.0, 578.0])
+
+    def test_session_pool(self):
+        configure_async_session_pool(AsyncSessionPool(concurrency=2))
+        url = "exchangeReport/STOCK_DAY" + PARAMS
+
+        async def fetch_all(base_url):
+            pool = get_async_session_pool()
+            return await asyncio.gather(
+                pool.request(base_url + url),
+                pool.get(base_url + url),
+                *(pool.request(base_url + "missing") for _ in range(4)),
+            )
+
+        with ReplayServer(self.directory) as server:
+            response, text, *missing = self.run_closing(fetch_all(server.url))
+            self.assertEqual(server.requests, 6)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.content_type, "application/json")
+        self.assertEqual(json.loads(response.body), PAYLOAD)
+        self.assertEqual(json.loads(text), PAYLOAD)
+        self.assertEqual([r.status for r in missing], [404] * 4)
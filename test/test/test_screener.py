@@ -0,0 +1,53 @@
+import random
+import unittest
+
+from twstock import analytics
+from twstock import screener
+from twstock.test.fixtures import make_stock
+
+
+class ScreenerTest(unittest.TestCase):
+    def test_matches_best_four_point(self):
+        rnd = random.Random(0)
+        stocks = [
+            make_stock(rnd, rnd.choice([6, 7, 10, 31]), str(i)) for i in range(200)
+        ]
+        signals = screener.screen(stocks)
+        self.assertEqual([s.sid for s in signals], [s.sid for s in stocks])
+        self.assertTrue(any(s.buy_reason for s in signals))
+        self.assertTrue(any(s.sell_reason for s in signals))
+
+        for target, signal in zip(stocks, signals):
+            bfp = analytics.BestFourPoint(target)
+            self.assertEqual(signal.best_four_point(), bfp.best_four_point())
+            self.assertEqual(signal.buy_reason, bfp.best_four_point_to_buy())
+            self.assertEqual(signal.sell_reason, bfp.best_four_point_to_sell())
+            self.assertEqual(
+                signal.buy,
+                (
+                    bfp.best_buy_1(),
+                    bfp.best_buy_2(),
+                    bfp.best_buy_3(),
+                    bfp.best_buy_4(),
+                ),
+            )
+            self.assertEqual(signal.buy_pivot, bfp.mins_bias_ratio()[0])
+            self.assertEqual(signal.sell_pivot, bfp.plus_bias_ratio()[0])
+            self.assertEqual(signal.price, target.price[-1])
+            self.assertEqual(signal.date, target.date[-1])
+
+    def test_short_history(self):
+        rnd = random.Random(1)
+        signals = screener.screen([make_stock(rnd, i, str(i)) for i in range(6)])
+        for signal in signals:
+            self.assertIsNone(signal.best_four_point())
+            self.assertEqual(signal.buy, (False,) * 4)
+            self.assertEqual(signal.sell, (False,) * 4)
+        self.assertIsNone(signals[0].price)
+        self.assertIsNone(signals[0].date)
+
+    def test_faster_than_loop(self):
+        rnd = random.Random(2)
+        stocks = [make_stock(rnd, 31, str(i)) for i in range(600)]
+        screen_seconds, loop_seconds = screener.benchmark(stocks)
+        self.assertLess(screen_seconds, loop_seconds)
@@ -0,0 +1,69 @@
+import asyncio
+import gc
+import shutil
+import tempfile
+import threading
+import unittest
+import warnings
+
+from twstock.async_session import AsyncSessionPool
+from twstock.replay import ReplayServer
+from twstock.session import SessionPool, get_session_pool
+from twstock.session import configure_session_pool, reset_session_pool
+from twstock.throttle import RateLimiter, configure_rate_limiter, reset_rate_limiter
+
+
+class SessionPoolTest(unittest.TestCase):
+    def tearDown(self):
+        reset_session_pool()
+
+    def test_configure(self):
+        pool = SessionPool(pool_maxsize=8)
+        configure_session_pool(pool)
+        self.assertIs(get_session_pool(), pool)
+
+        with self.assertRaises(BaseException):
+            configure_session_pool(object())
+
+    def test_session_per_thread(self):
+        pool = SessionPool()
+        self.assertIs(pool.session, pool.session)
+        self.assertIn("gzip", pool.session.headers["Accept-Encoding"])
+
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(pool.session))
+        thread.start()
+        thread.join()
+        self.assertIsNot(sessions[0], pool.session)
+
+        # Connection pool is shared between thread sessions
+        self.assertIs(
+            sessions[0].get_adapter("http://www.twse.com.tw/"),
+            pool.session.get_adapter("http://www.twse.com.tw/"),
+        )
+
+
+class AsyncSessionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        configure_rate_limiter(RateLimiter(rate=None, base_delay=0.0))
+
+    def tearDown(self):
+        reset_rate_limiter()
+        shutil.rmtree(self.directory)
+
+    def test_new_loop_closes_previous_session(self):
+        pool = AsyncSessionPool()
+        with ReplayServer(self.directory) as server:
+            asyncio.run(pool.request(server.url))
+            first = pool._session
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                asyncio.run(pool.request(server.url))
+                gc.collect()
+            self.assertTrue(first.closed)
+            self.assertIsNot(pool._session, first)
+            self.assertEqual(
+                [w for w in caught if issubclass(w.category, ResourceWarning)], []
+            )
+            asyncio.run(pool.close())
@@ -1,5 +1,8 @@
+import asyncio
 import datetime
+import random
 import unittest
+from twstock import analytics
 from twstock import stock
 
 
@@ -55,6 +58,37 @@ class FetcherTest(object):
         self.assertEqual(dt.change, 0.0)
         self.assertEqual(dt.transaction, 15718)
 
+    def test_purify_matches_make_datatuple(self):
+        rows = [
+            [
+                "106/05/02",
+                "45,851",
+                "9,053,856",
+                "198.50",
+                "199.00",
+                "195.50",
+                "196.50",
+                "+2.00",
+                "15,718",
+            ],
+            ["106/05/03", "1,851", "53,856", "--", "--", "--", "--", " 0.00", "718"],
+            [
+                "106/05/04",
+                "5,851",
+                "3,053,856",
+                "1,198.50",
+                "1,199.00",
+                "1,195.50",
+                "1,196.50",
+                "-2.50",
+                "5,718",
+            ],
+        ]
+        expected = [self.fetcher._make_datatuple(list(row)) for row in rows]
+        data = self.fetcher.purify({"data": rows, "aaData": rows})
+        self.assertIsInstance(data, stock.StockData)
+        self.assertEqual(data, expected)
+
 
 class TWSEFetcerTest(unittest.TestCase, FetcherTest):
     fetcher = stock.TWSEFetcher()
@@ -324,3 +358,194 @@ class TPEXStockTest(unittest.TestCase, StockTest):
                 583000,
             ],
         )
+
+
+def make_row(year, month, day=1, close=100.0):
+    return stock.DATATUPLE(
+        datetime.datetime(year, month, day),
+        1000,
+        100000,
+        99.0,
+        101.0,
+        98.0,
+        close,
+        1.0,
+        10,
+    )
+
+
+class FakeFetcher(object):
+    def fetch(self, year, month, sid, retry=5):
+        return {"stat": "OK", "data": [make_row(year, month)]}
+
+
+class FakeAsyncFetcher(object):
+    async def fetch(self, year, month, sid, retry=5):
+        await asyncio.sleep(0.01 if month % 2 else 0)
+        return {"stat": "OK", "data": [make_row(year, month)]}
+
+
+class StockFetchFromTest(unittest.TestCase):
+    def setUp(self):
+        self.stk = stock.Stock("2330", initial_fetch=False)
+        self.stk.fetcher = FakeFetcher()
+        self.stk.async_fetcher = FakeAsyncFetcher()
+
+    def test_fetch_from_workers_keep_order(self):
+        sequential = self.stk.fetch_from(2015, 5)
+        concurrent = self.stk.fetch_from(2015, 5, workers=8)
+        self.assertEqual(sequential, concurrent)
+        self.assertEqual(concurrent[0].date, datetime.datetime(2015, 5, 1))
+        self.assertEqual(concurrent, sorted(concurrent))
+        self.assertEqual(len(self.stk.raw_data), len(concurrent))
+
+    def test_afetch_from_keep_order(self):
+        sequential = self.stk.fetch_from(2015, 5)
+        self.assertEqual(asyncio.run(self.stk.afetch_from(2015, 5)), sequential)
+        self.assertEqual(len(self.stk.raw_data), len(sequential))
+
+
+class StockDataTest(unittest.TestCase):
+    def setUp(self):
+        self.rows = [make_row(2017, 5, day, close=100.0 + day) for day in range(1, 6)]
+        self.rows.append(
+            stock.DATATUPLE(
+                datetime.datetime(2017, 5, 8), 0, 0, None, None, None, None, 0.0, 0
+            )
+        )
+        self.data = stock.StockData(self.rows)
+
+    def test_rows(self):
+        self.assertEqual(len(self.data), len(self.rows))
+        self.assertEqual(self.data, self.rows)
+        self.assertEqual(self.data[0], self.rows[0])
+        self.assertEqual(self.data[-1], self.rows[-1])
+        self.assertEqual(self.data[-3:], self.rows[-3:])
+        self.assertIsInstance(self.data[-3:], stock.StockData)
+
+    def test_column_view(self):
+        close = self.data.column("close")
+        self.assertIsInstance(close, list)
+        self.assertEqual(close, [r.close for r in self.rows])
+        self.assertIs(close, self.data.column("close"))
+        with self.assertRaises(TypeError):
+            close.append(1.0)
+        with self.assertRaises(TypeError):
+            close[0] = 1.0
+
+    def test_mutation_invalidates_views(self):
+        close = self.data.column("close")
+        self.data.append(make_row(2017, 5, 9, close=120.0))
+        self.assertIsNot(close, self.data.column("close"))
+        self.assertEqual(self.data.column("close")[-1], 120.0)
+
+        self.data[-1] = make_row(2017, 5, 9, close=121.0)
+        self.assertEqual(self.data.column("close")[-1], 121.0)
+
+        del self.data[0]
+        self.assertEqual(self.data, self.rows[1:] + [make_row(2017, 5, 9, close=121.0)])
+
+    def test_stock_properties(self):
+        stk = stock.Stock("2330", initial_fetch=False)
+        stk.data = self.rows
+        self.assertIsInstance(stk.data, stock.StockData)
+        self.assertEqual(stk.price, [r.close for r in self.rows])
+        self.assertEqual(stk.date, [r.date for r in self.rows])
+        stk.data.append(make_row(2017, 5, 9))
+        self.assertEqual(len(stk.price), len(self.rows) + 1)
+
+    def test_prefix_sums(self):
+        data = stock.StockData(self.rows[:5])
+        close = data.prefix_sums("close")
+        self.assertEqual(close.sum(), sum(r.close for r in self.rows[:5]))
+        self.assertEqual(close.sum(-3), 312.0)
+        self.assertEqual(close.mean(1, 3), 102.5)
+        self.assertEqual(
+            data.prefix_sums("capacity").sum(0, 2), 2 * self.rows[0].capacity
+        )
+        with self.assertRaises(ValueError):
+            data.prefix_sums("date")
+
+        data.extend(self.rows[5:])
+        with self.assertRaises(ValueError):
+            close.sum()
+        self.assertEqual(close.sum(0, 5), 515.0)
+        del data[-1]
+        data.append(make_row(2017, 5, 9, close=110.0))
+        self.assertEqual(close.sum(-2), 215.0)
+        data[0] = make_row(2017, 5, 1, close=1.0)
+        self.assertEqual(close.sum(0, 2), 103.0)
+        del data[0]
+        self.assertEqual(close.sum(0, 2), 205.0)
+        data[1:1] = [make_row(2017, 5, 10, close=10.0)]
+        self.assertEqual(close.sum(), 534.0)
+        self.assertEqual(close.sum(0, 3), 215.0)
+        data[len(data) :] = [make_row(2017, 5, 11, close=5.0)]
+        self.assertEqual(close.sum(-2), 115.0)
+
+    def test_prefix_sums_moving_average(self):
+        rnd = random.Random(0)
+        rows = [
+            make_row(
+                2017, 1 + day // 28, 1 + day % 28, close=rnd.randint(100, 9999) / 20
+            )
+            for day in range(100)
+        ]
+        stk = stock.Stock("2330", initial_fetch=False, prefix_sums=True)
+        stk.data = rows[:90]
+        for row in rows[90:]:
+            stk.data.append(row)
+            for days in (1, 3, 5, 20, 60, 100):
+                expected = analytics._moving_average_exact(list(stk.price), days)
+                self.assertEqual(stk.moving_average(stk.price, days), expected)
+        self.assertIsNotNone(stk.price.prefix_sums)
+
+    def test_prefix_sums_stale_view(self):
+        stk = stock.Stock("2330", initial_fetch=False, prefix_sums=True)
+        stk.data = self.rows[:5]
+        price = stk.price
+        stk.data.append(make_row(2017, 5, 9, close=120.0))
+        self.assertIsNone(price.prefix_sums)
+        expected = analytics.Analytics().moving_average(list(price), 3)
+        self.assertEqual(stk.moving_average(price, 3), expected)
+        self.assertEqual(len(stk.moving_average(stk.price, 3)), len(price) - 1)
+
+
+class DailyFetcher(object):
+    def __init__(self, close=100.0):
+        self.close = close
+        self.months = []
+
+    def fetch(self, year, month, sid, retry=5):
+        self.months.append((year, month))
+        today = datetime.datetime.today()
+        last_day = today.day if (year, month) == (today.year, today.month) else 28
+        rows = [
+            make_row(year, month, day, self.close) for day in range(1, last_day + 1)
+        ]
+        return {"stat": "OK", "data": rows}
+
+
+class StockRefreshTest(unittest.TestCase):
+    def setUp(self):
+        self.stk = stock.Stock("2330", initial_fetch=False)
+        self.stk.fetcher = DailyFetcher()
+        self.today = datetime.datetime.today()
+        before = self.today - datetime.timedelta(days=60)
+        self.stk.fetch_from(before.year, before.month)
+
+    def test_refresh_only_fetches_current_month(self):
+        self.stk.fetcher = DailyFetcher(close=200.0)
+        held = len(self.stk.data)
+        self.stk.refresh()
+        self.assertEqual(self.stk.fetcher.months, [(self.today.year, self.today.month)])
+        self.assertEqual(len(self.stk.data), held)
+        self.assertEqual(self.stk.price[-1], 200.0)
+        self.assertEqual(self.stk.date, sorted(set(self.stk.date)))
+
+    def test_refresh_appends_missing_rows(self):
+        del self.stk.data[-3:]
+        self.stk.refresh(window=10)
+        self.assertEqual(len(self.stk.data), 10)
+        self.assertEqual(self.stk.date[-1].day, self.today.day)
+        self.assertEqual(self.stk.date, sorted(set(self.stk.date)))
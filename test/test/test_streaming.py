@@ -0,0 +1,81 @@
+import random
+import unittest
+
+from twstock import analytics
+from twstock import stock
+from twstock import streaming
+from twstock.test.fixtures import random_walk
+
+
+class StreamingTest(unittest.TestCase):
+    def setUp(self):
+        self.rnd = random.Random(0)
+        self.bars = random_walk(self.rnd, 50.0, volume=100)
+        self.ng = analytics.Analytics()
+
+    def make_bar(self):
+        return next(self.bars)
+
+    def feed(self, rows, indicators, steps=200):
+        """Append or replace bars and yield the prices after every step"""
+        for _ in range(steps):
+            row = self.make_bar()
+            if self.rnd.random() < 0.5:
+                rows[-1] = row
+                for indicator in indicators:
+                    indicator.replace_last(row.close)
+            else:
+                rows.append(row)
+                for indicator in indicators:
+                    indicator.append(row.close)
+            yield [row.close for row in rows]
+
+    def test_indicators(self):
+        rows = [self.make_bar() for _ in range(10)]
+        price = [row.close for row in rows]
+        average = streaming.MovingAverage(6, price)
+        bias = streaming.BiasRatio(3, 6, price)
+        continuous = streaming.Continuous(price)
+
+        for price in self.feed(rows, [average, bias, continuous]):
+            self.assertEqual(average.value, self.ng.moving_average(price, 6)[-1])
+            self.ng.price = price
+            self.assertEqual(bias.value, self.ng.ma_bias_ratio(3, 6)[-1])
+            self.assertEqual(continuous.value, self.ng.continuous(price))
+
+        for position in (True, False):
+            pivot = streaming.Pivot(5, position)
+            for value in [-0.3, 0.1, 0.5, 0.2, -0.1, 0.4, 0.4]:
+                pivot.append(value)
+            self.assertEqual(
+                pivot.replace_last(0.1),
+                self.ng.ma_bias_ratio_pivot([0.5, 0.2, -0.1, 0.4, 0.1], 5, position),
+            )
+
+    def test_not_ready(self):
+        average = streaming.MovingAverage(3, [1.0, 2.0])
+        self.assertIsNone(average.value)
+        self.assertEqual(average.append(3.0), 2.0)
+        self.assertEqual(streaming.Continuous([1.0]).value, 0)
+        self.assertIsNone(streaming.Pivot().value)
+        with self.assertRaises(ValueError):
+            streaming.MovingAverage(0)
+
+    def test_best_four_point(self):
+        for params in ((3, 6, 5), (2, 5, 4)):
+            rows = [self.make_bar() for _ in range(10)]
+            bfp = streaming.StreamingBestFourPoint(rows, *params)
+            self.assertEqual((bfp.short, bfp.long, bfp.sample_size), params)
+            target = stock.Stock("2330", initial_fetch=False)
+            for _ in range(200):
+                row = self.make_bar()
+                if self.rnd.random() < 0.5:
+                    rows[-1] = row
+                    bfp.replace_last(row)
+                else:
+                    rows.append(row)
+                    bfp.append(row)
+                target.data = rows
+                expected = analytics.BestFourPoint(target, *params)
+                self.assertEqual(bfp.best_four_point(), expected.best_four_point())
+                self.assertEqual(bfp.bias_ratio(True), expected.bias_ratio(True))
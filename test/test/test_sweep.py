@@ -0,0 +1,46 @@
+import random
+import unittest
+
+import numpy
+
+from twstock import backtest
+from twstock import matrix
+from twstock import sweep
+from twstock.test.fixtures import make_history
+
+
+class SweepTest(unittest.TestCase):
+    def setUp(self):
+        rnd = random.Random(0)
+        histories = {
+            str(i): make_history(rnd, rnd.choice([5, 40, 80])) for i in range(20)
+        }
+        self.matrix = matrix.StockMatrix.from_histories(histories)
+        self.params = sweep.grid(short=(2, 3), long=(3, 6, 10), sample_size=(4, 5))
+
+    def test_grid(self):
+        self.assertEqual(len(self.params), 10)
+        self.assertIn((3, 6, 5), self.params)
+        self.assertNotIn((3, 3, 5), self.params)
+
+    def test_matches_backtest(self):
+        results = sweep.sweep(self.matrix, self.params, horizons=(1, 5))
+        self.assertEqual([r[:3] for r in results], self.params)
+        for result in results:
+            expected = backtest.Backtest(self.matrix, *result[:3]).summary((1, 5))
+            self.assertEqual(result.summary, expected)
+
+    def test_process_pool(self):
+        self.assertEqual(
+            sweep.sweep(self.matrix, self.params, use_pivot=True, workers=2),
+            sweep.sweep(self.matrix, self.params, use_pivot=True),
+        )
+
+    def test_cached_moving_average(self):
+        cached = sweep.CachedMatrix(self.matrix.sids, self.matrix.columns)
+        average = cached.moving_average(cached.price, 3)
+        self.assertIs(cached.moving_average(cached.price, 3), average)
+        self.assertFalse(average.flags.writeable)
+        numpy.testing.assert_array_equal(
+            average, self.matrix.moving_average(self.matrix.price, 3)
+        )
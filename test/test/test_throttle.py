@@ -0,0 +1,51 @@
+import unittest
+
+from twstock.throttle import RateLimiter, get_rate_limiter
+from twstock.throttle import configure_rate_limiter, reset_rate_limiter
+
+URL = "http://www.twse.com.tw/exchangeReport/STOCK_DAY"
+OTHER_URL = "http://www.tpex.org.tw/web/stock/"
+
+
+class RateLimiterTest(unittest.TestCase):
+    def tearDown(self):
+        reset_rate_limiter()
+
+    def test_configure(self):
+        limiter = RateLimiter(rate=1.0)
+        configure_rate_limiter(limiter)
+        self.assertIs(get_rate_limiter(), limiter)
+
+        with self.assertRaises(BaseException):
+            configure_rate_limiter(object())
+
+    def test_token_bucket(self):
+        limiter = RateLimiter(rate=10.0, burst=2)
+        self.assertEqual(limiter.reserve(URL), 0.0)
+        self.assertEqual(limiter.reserve(URL), 0.0)
+        self.assertAlmostEqual(limiter.reserve(URL), 0.1, places=2)
+        self.assertAlmostEqual(limiter.reserve(URL), 0.2, places=2)
+
+        # Buckets are per host
+        self.assertEqual(limiter.reserve(OTHER_URL), 0.0)
+
+    def test_host_rates(self):
+        limiter = RateLimiter(rate=None, host_rates={"www.twse.com.tw": (1.0, 1)})
+        self.assertEqual(limiter.reserve(URL), 0.0)
+        self.assertGreater(limiter.reserve(URL), 0.9)
+        for _ in range(10):
+            self.assertEqual(limiter.reserve(OTHER_URL), 0.0)
+
+    def test_backoff(self):
+        limiter = RateLimiter(rate=None, base_delay=1.0, max_delay=3.0)
+        first = limiter.throttled(URL)
+        self.assertTrue(0.5 <= first <= 1.0)
+        second = limiter.throttled(URL)
+        self.assertTrue(1.0 <= second <= 2.0)
+        third = limiter.throttled(URL)
+        self.assertTrue(1.5 <= third <= 3.0)
+        self.assertGreater(limiter.reserve(URL), 1.0)
+        self.assertEqual(limiter.reserve(OTHER_URL), 0.0)
+
+        limiter.succeeded(URL)
+        self.assertTrue(0.5 <= limiter.throttled(URL) <= 1.0)
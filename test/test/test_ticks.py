@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from twstock import realtime
+from twstock import ticks
+
+TLONG = 1728628200000
+
+
+def make_quote(code, tick, price="100.0000", bids="99.0000_98.0000_"):
+    return realtime.Quote(
+        {
+            "c": code,
+            "ch": code + ".tw",
+            "n": code,
+            "nf": code,
+            "tlong": str(TLONG + tick * 5000),
+            "z": price,
+            "tv": "1",
+            "v": str(10 + tick),
+            "b": bids,
+            "g": "1_2_",
+            "a": "101.0000_",
+            "f": "3_",
+            "o": "99.0000",
+            "h": "101.0000",
+            "l": "98.0000",
+        }
+    )
+
+
+class TicksTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.day = make_quote("2330", 0).datetime.date()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self, *polls):
+        with ticks.TickRecorder(self.directory) as recorder:
+            return [recorder.record(poll) for poll in polls]
+
+    def test_record_and_read(self):
+        counts = self.record(
+            {"2330": make_quote("2330", 0), "6223": make_quote("6223", 0)},
+            {"2330": make_quote("2330", 0), "success": True},
+            make_quote("2330", 1, price="-", bids="-_98.0000_"),
+        )
+        self.assertEqual(counts, [2, 0, 1])
+
+        reader = ticks.TickReader(self.directory, self.day)
+        self.assertEqual(reader.symbols(), ["2330", "6223"])
+        records = reader.ticks("2330")
+        self.assertIsInstance(records.base, numpy.memmap)
+        self.assertEqual(records["tlong"].tolist(), [TLONG, TLONG + 5000])
+        self.assertEqual(records["volume"].tolist(), [10, 11])
+        self.assertEqual(records["price"][0], 100.0)
+        self.assertTrue(math.isnan(records["price"][1]))
+        self.assertEqual(records["bid_prices"][0, :2].tolist(), [99.0, 98.0])
+        self.assertTrue(numpy.isnan(records["bid_prices"][0, 2:]).all())
+        self.assertEqual(records["ask_volumes"][0].tolist(), [3, 0, 0, 0, 0])
+
+    def test_time_range(self):
+        self.record(*[make_quote("2330", tick) for tick in range(10)])
+        reader = ticks.TickReader(self.directory, ticks.day_of(self.day))
+        start = datetime.datetime.fromtimestamp(TLONG / 1000 + 10)
+        tlong = reader.field("2330", "tlong", start, TLONG / 1000 + 30)
+        self.assertEqual(
+            tlong.tolist(), [TLONG + 10000, TLONG + 15000, TLONG + 20000, TLONG + 25000]
+        )
+        self.assertEqual(len(reader.load()["2330"]), 10)
+        self.assertEqual(len(reader.ticks("9999")), 0)
+
+    def test_append_after_reopen(self):
+        self.record(make_quote("2330", 0), make_quote("2330", 1))
+        path = ticks.TickRecorder(self.directory).path("2330", self.day)
+        with open(path, "ab") as f:
+            f.write(b"\0" * 7)  # Record cut short
+        self.assertEqual(
+            self.record(make_quote("2330", 1), make_quote("2330", 2)), [0, 1]
+        )
+        self.assertEqual(os.path.getsize(path), 3 * ticks.TICK_STRUCT.size)
+        reader = ticks.TickReader(self.directory, self.day)
+        self.assertEqual(reader.field("2330", "volume").tolist(), [10, 11, 12])